@@ -27,7 +27,6 @@ from utils_scheduler.schedule_and_run_static import schedule_runs
 import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
 
 class FLAGS:
-    RECEIVED = 1
     RUN_FINISHED = 2
     EXIT = 3
     NEW_RUN = 4
@@ -77,14 +76,7 @@ if __name__ == '__main__':
         scenarios_list = generate_scenarios_list()
 
         # get the info for all processes
-        processes = []
-        while len(processes) < nprocs - 1:
-            status = MPI.Status()
-            comm.Iprobe(status=status)
-            if status.tag == 1:
-                print(f'status:{status.source}', flush=True)
-                proc_info = comm.recv(source=status.source, tag=status.tag)
-                processes.append(proc_info)
+        processes = comm.gather(None, root=0)[1:]
         print(processes)
 
         # static gpu assignment per process. Currently only a single gpu per process
@@ -121,8 +113,7 @@ if __name__ == '__main__':
         proc_info = {'rank': rank,
                      'hostname': hostname,
                      'n_gpus': n_gpus}
-        req = comm.isend(proc_info, 0, 1)
-        req.wait()
+        comm.gather(proc_info, root=0)
 
         while True:
             status = MPI.Status()
@@ -25,7 +25,6 @@ from utils_scheduler.schedule_and_run import schedule_runs
 import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
 
 class FLAGS:
-    RECEIVED = 1
     RUN_FINISHED = 2
     EXIT = 3
     NEW_RUN = 4
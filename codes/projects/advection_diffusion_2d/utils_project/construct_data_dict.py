@@ -32,8 +32,8 @@ def construct_data_dict(hyperp, options, filepaths):
     if options.obs_type == 'obs':
         obs_dimensions = options.num_obs_points*options.num_time_steps
         print('Loading Boundary Indices')
-        df_obs_indices = pd.read_csv(filepaths.project.obs_indices + '.csv')
-        obs_indices = df_obs_indices.to_numpy()
+        obs_indices = np.loadtxt(filepaths.project.obs_indices + '.csv',
+                                 dtype=np.int32, delimiter=',', skiprows=1, ndmin=2)
 
     #=== Prepare Data ===#
     data = DataHandler(hyperp, options, filepaths,
@@ -0,0 +1,72 @@
+'''Constructs the mesh and function space and caches the mesh to disk
+
+Generating the rectangular with hole mesh is much more expensive than building
+the function space on it. Therefore the mesh is stored in a HDF5 file the first
+time it is generated and is loaded from that file on subsequent calls. The file
+name contains a hash of the mesh properties so that a change in any of them
+generates and caches a new mesh.
+
+Inputs:
+    - options: dictionary storing the set options including the mesh properties
+    - filepath_mesh: string of the filepath, without the hash and extension,
+                     of the cached mesh
+
+Outputs:
+    - Vh: the FEniCS function space
+    - nodes: coordinates of the degrees of freedom
+    - dof: number of degrees of freedom
+
+Author: Hwan Goh, Oden Institute, Austin, Texas 2020
+'''
+import os
+import hashlib
+
+import dolfin as dl
+
+# Import FEniCS code
+from utils_mesh.construct_mesh_rectangular_with_hole import construct_mesh
+
+import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
+
+def construct_mesh_cached(options, filepath_mesh):
+
+    #=== Mesh Properties Hash ===#
+    mesh_properties = (getattr(options, 'flow_navier_stokes', None),
+                       options.hole_single_circle,
+                       options.hole_two_rectangles,
+                       getattr(options, 'circle_center', None),
+                       getattr(options, 'circle_radius', None),
+                       getattr(options, 'discretization_circle', None),
+                       options.discretization_domain,
+                       options.domain_length,
+                       options.domain_width,
+                       options.rect_1_point_1,
+                       options.rect_1_point_2,
+                       options.rect_2_point_1,
+                       options.rect_2_point_2)
+    mesh_hash = hashlib.md5(repr(mesh_properties).encode()).hexdigest()[:12]
+    filepath_mesh_hash = filepath_mesh + '_' + mesh_hash + '.h5'
+
+    #=== Load or Construct Mesh ===#
+    if os.path.exists(filepath_mesh_hash):
+        mesh = dl.Mesh()
+        hdf = dl.HDF5File(mesh.mpi_comm(), filepath_mesh_hash, 'r')
+        hdf.read(mesh, '/mesh', False)
+        hdf.close()
+        Vh = dl.FunctionSpace(mesh, "Lagrange", 1)
+    else:
+        Vh, _, _ = construct_mesh(options)
+        mesh = Vh.mesh()
+        # Written to a file private to this process and then renamed into place
+        # so that concurrent scenarios never read a partially written mesh
+        filepath_mesh_tmp = filepath_mesh + '_' + mesh_hash + '_%d_tmp.h5'%(os.getpid())
+        hdf = dl.HDF5File(mesh.mpi_comm(), filepath_mesh_tmp, 'w')
+        hdf.write(mesh, '/mesh')
+        hdf.close()
+        os.replace(filepath_mesh_tmp, filepath_mesh_hash)
+
+    #=== Get the Mesh Topology ===#
+    nodes = Vh.tabulate_dof_coordinates()
+    dof = Vh.dim()
+
+    return Vh, nodes, dof
@@ -171,6 +171,9 @@ class FilePathsProject:
         self.fem_operator_implicit_ts_rhs = directory_dataset +\
                 'fem_operator_implicit_ts_rhs_' + num_nodes_string
 
+        #=== Mesh ===#
+        self.mesh = directory_dataset + 'mesh_' + num_nodes_string
+
 ###############################################################################
 #                               Prior Strings                                 #
 ###############################################################################
@@ -21,19 +21,18 @@ def plot_fem_function_fenics_2d(function_space, nodal_values,
                                 cross_section_y,
                                 title, filepath,
                                 fig_size, colorbar_limits,
-                                plot_hline_flag):
+                                plot_hline_flag,
+                                triangulation = None):
 
     #=== Convert array to dolfin function ===#
     nodal_values_fe = convert_array_to_dolfin_function(function_space, nodal_values)
 
-    #=== Extract mesh and triangulate ===#
-    mesh = nodal_values_fe.function_space().mesh()
-    coords = mesh.coordinates()
-    elements = mesh.cells()
-    triangulation = tri.Triangulation(coords[:, 0], coords[:, 1], elements)
+    #=== Triangulate mesh if a prebuilt triangulation is not provided ===#
+    if triangulation is None:
+        triangulation = construct_triangulation(function_space)
 
     #=== Plot figure ===#
-    nodal_values = nodal_values_fe.compute_vertex_values(mesh)
+    nodal_values = nodal_values_fe.compute_vertex_values(function_space.mesh())
     v = np.linspace(colorbar_limits[0], colorbar_limits[1], 40, endpoint=True)
 
     plt.figure(figsize = fig_size)
@@ -50,3 +49,12 @@ def plot_fem_function_fenics_2d(function_space, nodal_values,
     #=== Save figure ===#
     plt.savefig(filepath, dpi=100, bbox_inches = 'tight', pad_inches = 0)
     plt.close()
+
+def construct_triangulation(function_space):
+
+    #=== Extract mesh and triangulate ===#
+    mesh = function_space.mesh()
+    coords = mesh.coordinates()
+    elements = mesh.cells()
+
+    return tri.Triangulation(coords[:, 0], coords[:, 1], elements)
@@ -27,6 +27,7 @@ import os
 
 sys.path.insert(0, os.path.realpath('../../../../../fenics-simulations/src'))
 
+import tensorflow as tf
 import numpy as np
 import pandas as pd
 
@@ -36,12 +37,11 @@ from neural_networks.nn_vae import VAE
 from utils_misc.positivity_constraints import positivity_constraint_log_exp
 
 # Import project utilities
-from utils_project.plot_fem_function_fenics_2d import plot_fem_function_fenics_2d
+from utils_project.construct_mesh_cached import construct_mesh_cached
+from utils_project.plot_fem_function_fenics_2d import plot_fem_function_fenics_2d,\
+                                                     construct_triangulation
 from utils_project.plot_cross_section import plot_cross_section
 
-# Import FEniCS code
-from utils_mesh.construct_mesh_rectangular_with_hole import construct_mesh
-
 import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
 
 ###############################################################################
@@ -61,13 +61,13 @@ def predict_and_plot(hyperp, options, filepaths):
     options.rect_2_point_2 = [0.75, 0.85]
 
     #=== Construct Mesh ===#
-    Vh, nodes, dof = construct_mesh(options)
+    Vh, nodes, dof = construct_mesh_cached(options, filepaths.project.mesh)
 
     #=== Load Observation Indices ===#
     obs_dimensions = options.num_obs_points*options.num_time_steps
     print('Loading Boundary Indices')
-    df_obs_indices = pd.read_csv(filepaths.project.obs_indices + '.csv')
-    obs_indices = df_obs_indices.to_numpy()
+    obs_indices = np.loadtxt(filepaths.project.obs_indices + '.csv',
+                             dtype=np.int32, delimiter=',', skiprows=1, ndmin=2)
 
     #=== Data and Latent Dimensions of Autoencoder ===#
     input_dimensions = obs_dimensions
@@ -95,29 +95,43 @@ def predict_and_plot(hyperp, options, filepaths):
              positivity_constraint_log_exp)
     nn.load_weights(filepaths.trained_nn)
 
+    #=== Compiled Encoder and Decoder for Inference ===#
+    encode = tf.function(nn.encoder, jit_compile=True,
+            input_signature=[tf.TensorSpec([None, input_dimensions], tf.float32)])
+    draw = tf.function(nn.reparameterize, jit_compile=True)
+
+    #=== Draw, Positivity Constraint and Decoder Fused into One Graph ===#
+    if options.model_aware == 1:
+        @tf.function(jit_compile=True)
+        def draw_and_decode(mean, log_var):
+            posterior_draw = nn.reparameterize(mean, log_var)
+            return posterior_draw, nn.decoder(posterior_draw)
+
     #=== Selecting Samples ===#
     sample_number = 15
-    parameter_test_sample = np.expand_dims(parameter_test[sample_number,:], 0)
-    state_obs_test_sample = np.expand_dims(state_obs_test[sample_number,:], 0)
+    parameter_test_sample = parameter_test[sample_number:sample_number+1,:]
+    state_obs_test_sample = state_obs_test[sample_number:sample_number+1,:]
 
     #=== Predictions ===#
-    posterior_mean_pred, posterior_cov_pred = nn.encoder(state_obs_test_sample)
-    posterior_pred_draw = nn.reparameterize(posterior_mean_pred, posterior_cov_pred)
+    posterior_mean_pred, posterior_cov_pred = encode(state_obs_test_sample)
+    if options.model_aware == 1:
+        posterior_pred_draw, state_obs_pred_draw = draw_and_decode(
+                posterior_mean_pred, posterior_cov_pred)
+        state_obs_pred_draw = state_obs_pred_draw.numpy().flatten()
+    else:
+        posterior_pred_draw = draw(posterior_mean_pred, posterior_cov_pred)
 
     posterior_mean_pred = posterior_mean_pred.numpy().flatten()
     posterior_cov_pred = posterior_cov_pred.numpy().flatten()
     posterior_pred_draw = posterior_pred_draw.numpy().flatten()
 
-    if options.model_aware == 1:
-        state_obs_pred_draw = nn.decoder(np.expand_dims(posterior_pred_draw, 0))
-        state_obs_pred_draw = state_obs_pred_draw.numpy().flatten()
-
     #=== Plotting Prediction ===#
     print('================================')
     print('      Plotting Predictions      ')
     print('================================')
 
     #=== Plot FEM Functions ===#
+    triangulation = construct_triangulation(Vh)
     cross_section_y = 0.8
     filename_extension = '_%d.png'%(sample_number)
     plot_fem_function_fenics_2d(Vh, parameter_test_sample,
@@ -125,30 +139,35 @@ def predict_and_plot(hyperp, options, filepaths):
                                 '',
                                 filepaths.figure_parameter_test + filename_extension,
                                 (5,5), (0,5),
-                                False)
+                                False,
+                                triangulation = triangulation)
     plot_fem_function_fenics_2d(Vh, posterior_mean_pred,
                                 cross_section_y,
                                 '',
                                 filepaths.figure_posterior_mean + filename_extension,
                                 (5,5), (0,5),
-                                True)
+                                True,
+                                triangulation = triangulation)
     plot_fem_function_fenics_2d(Vh, posterior_pred_draw,
                                 cross_section_y,
                                 '',
                                 filepaths.figure_parameter_pred + filename_extension,
                                 (5,5), (0,5),
-                                True)
+                                True,
+                                triangulation = triangulation)
     if options.obs_type == 'full':
         plot_fem_function_fenics_2d(Vh, state_obs_test_sample,
                                     cross_section_y,
                                     'True State',
                                     filepaths.figure_state_test + filename_extension,
-                                    (5,5))
+                                    (5,5),
+                                    triangulation = triangulation)
         plot_fem_function_fenics_2d(Vh, state_obs_pred_draw,
                                     cross_section_y,
                                     'State Prediction',
                                     filepaths.figure_state_pred + filename_extension,
-                                    (5,5))
+                                    (5,5),
+                                    triangulation = triangulation)
 
     #=== Plot Cross-Section with Error Bounds ===#
     plot_cross_section(Vh,
@@ -51,8 +51,8 @@ def predict_and_plot(hyperp, options, filepaths):
     if options.obs_type == 'obs':
         obs_dimensions = options.num_obs_points
         print('Loading Boundary Indices')
-        df_obs_indices = pd.read_csv(filepaths.project.obs_indices + '.csv')
-        obs_indices = df_obs_indices.to_numpy()
+        obs_indices = np.loadtxt(filepaths.project.obs_indices + '.csv',
+                                 dtype=np.int32, delimiter=',', skiprows=1, ndmin=2)
 
     #=== Data and Latent Dimensions of Autoencoder ===#
     input_dimensions = obs_dimensions
@@ -77,8 +77,8 @@ def predict_and_plot(hyperp, options, filepaths):
 
     #=== Selecting Samples ===#
     sample_number = 105
-    parameter_test_sample = np.expand_dims(parameter_test[sample_number,:], 0)
-    state_obs_test_sample = np.expand_dims(state_obs_test[sample_number,:], 0)
+    parameter_test_sample = parameter_test[sample_number:sample_number+1,:]
+    state_obs_test_sample = state_obs_test[sample_number:sample_number+1,:]
 
     #=== Predictions ===#
     parameter_pred_sample, _ = nn.iaf_chain_posterior(nn.encoder(state_obs_test_sample))
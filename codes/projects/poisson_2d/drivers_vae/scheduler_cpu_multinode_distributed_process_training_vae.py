@@ -5,20 +5,20 @@
 You will need to specify:
     - In generate_scenarios_list() the set of hyperparameter scenarios you
       wish to use
-    - In subprocess.Popen() whether the parameter-to-observable map is
-      modelled or learned through specification of which training
-      driver to call
+    - In the worker processes' action whether the parameter-to-observable
+      map is modelled or learned through specification of which training
+      driver to import
 
 Author: Jonathan Wittmer, Oden Institute, Austin, Texas 2019
 '''
 import socket
-import subprocess
 from mpi4py import MPI
 
 import os
 import sys
 sys.path.insert(0, os.path.realpath('../../../src'))
 import json
+import traceback
 
 from utils_scheduler.get_hyperparameter_combinations import get_hyperparameter_combinations
 from utils_scheduler.schedule_and_run_static import schedule_runs
@@ -26,7 +26,6 @@ from utils_scheduler.schedule_and_run_static import schedule_runs
 import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
 
 class FLAGS:
-    RECEIVED = 1
     RUN_FINISHED = 2
     EXIT = 3
     NEW_RUN = 4
@@ -70,14 +69,7 @@ if __name__ == '__main__':
         scenarios_list = generate_scenarios_list()
 
         # get the info for all processes
-        processes = []
-        while len(processes) < nprocs - 1:
-            status = MPI.Status()
-            comm.Iprobe(status=status)
-            if status.tag == 1:
-                print(f'status:{status.source}', flush=True)
-                proc_info = comm.recv(source=status.source, tag=status.tag)
-                processes.append(proc_info)
+        processes = comm.gather(None, root=0)[1:]
         print(processes)
 
         # static gpu assignment per process. Currently only a single gpu per process
@@ -107,13 +99,20 @@ if __name__ == '__main__':
 
     else:
         # This is the worker processes' action
+        # Import the training driver once so that Tensorflow and the driver
+        # modules are loaded once per worker rather than once per scenario
+        import tensorflow as tf
+        # workers have no GPU to hide the launch overhead of each op so let
+        # XLA cluster and fuse the ops of the traced training steps
+        tf.config.optimizer.set_jit(True)
+        from training_vae_model_augmented_autodiff import drive
+
         # First send process info to master process
         # number of gpus in this node
         hostname = socket.gethostname()
         proc_info = {'rank': rank,
                      'hostname': hostname}
-        req = comm.isend(proc_info, 0, 1)
-        req.wait()
+        comm.gather(proc_info, root=0)
 
         while True:
             status = MPI.Status()
@@ -124,13 +123,29 @@ if __name__ == '__main__':
 
             # convert dictionary to json
             scenario_json = json.dumps(scenario)
-            # proc = subprocess.Popen(['./training_vae_model_aware.py',
-            #     f'{scenario_json}',f'{"cpu"}'])
-            proc = subprocess.Popen(['./training_vae_model_augmented_autodiff.py',
-                f'{scenario_json}',f'{"cpu"}'])
-            proc.wait()
-
-            req = comm.isend([], 0, FLAGS.RUN_FINISHED)
-            req.wait()
+
+            # A failed scenario is reported and skipped so that the worker stays
+            # alive and the master still receives RUN_FINISHED for it. The
+            # process wide state that a scenario may change is restored after
+            # each scenario so that it does not carry over to the next one
+            global_policy = tf.keras.mixed_precision.global_policy()
+            cuda_visible_devices = os.environ.get('CUDA_VISIBLE_DEVICES')
+            try:
+                drive(scenario_json, 'cpu')
+            except Exception:
+                traceback.print_exc()
+            finally:
+                tf.keras.mixed_precision.set_global_policy(global_policy)
+                tf.config.optimizer.set_jit(True)
+                if cuda_visible_devices is None:
+                    os.environ.pop('CUDA_VISIBLE_DEVICES', None)
+                else:
+                    os.environ['CUDA_VISIBLE_DEVICES'] = cuda_visible_devices
+
+                # release the graphs and layers of the finished scenario
+                tf.keras.backend.clear_session()
+
+                req = comm.isend([], 0, FLAGS.RUN_FINISHED)
+                req.wait()
 
     print('All scenarios computed')
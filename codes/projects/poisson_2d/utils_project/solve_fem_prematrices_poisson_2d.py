@@ -66,22 +66,20 @@ class SolveFEMPrematricesPoisson2D:
 ###############################################################################
 #                           Using Sparse Prematrices                          #
 ###############################################################################
+    @tf.function
     def solve_pde_prematrices_sparse(self, parameters):
 
         #=== Solving PDE ===#
-        stiffness_matrix = tf.reshape(
-                tf.sparse.sparse_dense_matmul(
-                    self.prestiffness, tf.expand_dims(tf.transpose(parameters[0,:]), axis=1)),
-                    (self.options.parameter_dimensions, self.options.parameter_dimensions))
-        state = tf.transpose(
-                tf.linalg.solve(stiffness_matrix + self.boundary_matrix, self.load_vector))
-        for n in range(1, parameters.shape[0]):
+        num_samples = tf.shape(parameters)[0]
+        state = tf.TensorArray(tf.float32, size=num_samples)
+        for n in tf.range(num_samples):
             stiffness_matrix = tf.reshape(
                     tf.sparse.sparse_dense_matmul(
-                        self.prestiffness, tf.expand_dims(tf.transpose(parameters[n,:]), axis=1)),
+                        self.prestiffness, tf.expand_dims(parameters[n,:], axis=1)),
                     (self.options.parameter_dimensions, self.options.parameter_dimensions))
             solution = tf.linalg.solve(stiffness_matrix + self.boundary_matrix, self.load_vector)
-            state = tf.concat([state, tf.transpose(solution)], axis=0)
+            state = state.write(n, tf.squeeze(solution, axis=1))
+        state = state.stack()
 
         #=== Generate Measurement Data ===#
         if self.options.obs_type == 'obs':
@@ -65,13 +65,13 @@ def add_options(options):
 ###############################################################################
 #                                    Driver                                   #
 ###############################################################################
-if __name__ == "__main__":
+def drive(scenario_json = None, which_gpu = None):
 
     #=== Hyperparameters ===#
     with open('../config_files/hyperparameters_vae.yaml') as f:
         hyperp = yaml.safe_load(f)
-    if len(sys.argv) > 1:
-        hyperp = command_line_json_string_to_dict(sys.argv[1], hyperp)
+    if scenario_json is not None:
+        hyperp = command_line_json_string_to_dict(scenario_json, hyperp)
     hyperp = AttrDict(hyperp)
 
     #=== Options ===#
@@ -79,8 +79,8 @@ if __name__ == "__main__":
         options = yaml.safe_load(f)
     options = AttrDict(options)
     options = add_options(options)
-    if len(sys.argv) > 1: # if run from scheduler
-        options.which_gpu = sys.argv[2]
+    if which_gpu is not None: # if run from scheduler
+        options.which_gpu = which_gpu
     options.model_aware = False
     options.model_augmented = True
     options.posterior_diagonal_covariance = True
@@ -101,3 +101,9 @@ if __name__ == "__main__":
     #=== Initiate training ===#
     training(hyperp, options, filepaths,
              data_dict, prior_dict)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1: # if run from scheduler
+        drive(sys.argv[1], sys.argv[2])
+    else:
+        drive()
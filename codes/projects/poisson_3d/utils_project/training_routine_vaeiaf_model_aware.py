@@ -89,22 +89,33 @@ def training(hyperp, options, filepaths,
 
     #=== Distributed Training ===#
     if options.distributed_training == 1:
-        dist_strategy = tf.distribute.MirroredStrategy()
-        with dist_strategy.scope():
-            #=== Neural Network ===#
-            nn = VAEIAF(hyperp, options,
-                        input_dimensions, latent_dimensions,
-                        kernel_initializer, bias_initializer,
-                        True)
-
-            #=== Optimizer ===#
-            optimizer = tf.keras.optimizers.Adam()
-
-        #=== Training ===#
-        optimize_distributed(dist_strategy,
-                hyperp, options, filepaths,
-                nn, optimizer,
-                input_and_latent_train, input_and_latent_val, input_and_latent_test,
-                input_dimensions, latent_dimensions, num_batches_train,
-                data_dict["noise_regularization_matrix"],
-                prior_dict["prior_mean"], prior_dict["prior_covariance_cholesky_inverse"])
+        dist_strategy = tf.distribute.MirroredStrategy(
+                cross_device_ops = tf.distribute.NcclAllReduce())
+        # The policy in place before training is restored afterwards, also when
+        # training raises, so that it does not carry over to later models
+        global_policy = tf.keras.mixed_precision.global_policy()
+        if options.mixed_precision == True:
+            tf.keras.mixed_precision.set_global_policy('mixed_float16')
+        try:
+            with dist_strategy.scope():
+                #=== Neural Network ===#
+                nn = VAEIAF(hyperp, options,
+                            input_dimensions, latent_dimensions,
+                            kernel_initializer, bias_initializer,
+                            True)
+
+                #=== Optimizer ===#
+                optimizer = tf.keras.optimizers.Adam()
+                if options.mixed_precision == True:
+                    optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+
+            #=== Training ===#
+            optimize_distributed(dist_strategy,
+                    hyperp, options, filepaths,
+                    nn, optimizer,
+                    input_and_latent_train, input_and_latent_val, input_and_latent_test,
+                    input_dimensions, latent_dimensions, num_batches_train,
+                    data_dict["noise_regularization_matrix"],
+                    prior_dict["prior_mean"], prior_dict["prior_covariance_cholesky_inverse"])
+        finally:
+            tf.keras.mixed_precision.set_global_policy(global_policy)
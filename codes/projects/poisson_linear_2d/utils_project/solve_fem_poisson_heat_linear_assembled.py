@@ -22,22 +22,23 @@ class SolveFEMPoissonHeatLinearAssembled:
         self.mass_matrix = mass_matrix
         self.load_vector = load_vector
 
+        #=== Load Vector as Row for Broadcasting Across the Batch ===#
+        self.load_vector_T = tf.transpose(self.load_vector)
+
+        #=== Rows of the Forward Operator at the Observation Points ===#
+        if options.obs_type == 'obs':
+            self.forward_matrix_obs = tf.gather(self.forward_matrix, self.obs_indices[:,0],
+                                                axis=0)
+
+    @tf.function(jit_compile=True)
     def solve_pde(self, parameters):
         #=== Solving PDE ===#
-        rhs = tf.linalg.matmul(
-                tf.expand_dims(parameters[0,:], axis=0), tf.transpose(self.mass_matrix))\
-                + tf.transpose(self.load_vector)
-        state = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-        for n in range(1, parameters.shape[0]):
-            rhs = tf.linalg.matmul(
-                    tf.expand_dims(parameters[n,:], axis=0), tf.transpose(self.mass_matrix))\
-                    + tf.transpose(self.load_vector)
-            solution = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-            state = tf.concat([state, solution], axis=0)
+        rhs = tf.linalg.matmul(parameters, self.mass_matrix, transpose_b=True)\
+                + self.load_vector_T
 
         #=== Generate Measurement Data ===#
         if self.options.obs_type == 'obs':
-            state_obs = tf.gather(state, self.obs_indices, axis=1)
+            state_obs = tf.linalg.matmul(rhs, self.forward_matrix_obs, transpose_b=True)
             return tf.squeeze(state_obs)
         else:
-            return state
+            return tf.linalg.matmul(rhs, self.forward_matrix, transpose_b=True)
@@ -104,7 +104,8 @@ def training(hyperp, options, filepaths,
 
     #=== Distributed Training ===#
     if options.distributed_training == 1:
-        dist_strategy = tf.distribute.MirroredStrategy()
+        dist_strategy = tf.distribute.MirroredStrategy(
+                cross_device_ops = tf.distribute.NcclAllReduce())
         with dist_strategy.scope():
             #=== Neural Network ===#
             nn = VAE(hyperp, options,
@@ -20,6 +20,11 @@ class SolveFEMLinearDirichlet1D:
         self.forward_matrix = forward_matrix
         self.mass_matrix = mass_matrix
 
+        #=== Rows of the Forward Operator at the Observation Points ===#
+        if options.obs_type == 'obs':
+            self.forward_matrix_obs = tf.gather(self.forward_matrix, self.obs_indices[:,0],
+                                                axis=0)
+
         #=== Implementing Dirchlet Boundary Conditions ===#
         self.dirichlet_mult_vec = np.ones([options.parameter_dimensions],np.float32)
         self.dirichlet_mult_vec[0] = 0
@@ -29,27 +34,27 @@ class SolveFEMLinearDirichlet1D:
         self.dirichlet_add_vec[-1] = 1
         self.dirichlet_add_vec = tf.cast(self.dirichlet_add_vec, tf.float32)
 
-    def solve_pde(self, parameters):
-        #=== Solving PDE ===#
-        rhs = tf.linalg.matmul(
-                tf.expand_dims(parameters[0,:], axis=0), tf.transpose(self.mass_matrix))
-        rhs = tf.math.multiply(self.dirichlet_mult_vec, rhs)
-        rhs = tf.math.add(self.dirichlet_add_vec, rhs)
-        state = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-        for n in range(1, parameters.shape[0]):
-            rhs = tf.linalg.matmul(
-                    tf.expand_dims(parameters[n,:], axis=0), tf.transpose(self.mass_matrix))
-            rhs = tf.math.multiply(self.dirichlet_mult_vec, rhs)
-            rhs = tf.math.add(self.dirichlet_add_vec, rhs)
-            solution = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-            state = tf.concat([state, solution], axis=0)
+        #=== Parameter-to-Observable Map as a Single Affine Map ===#
+        # The mass matrix, the boundary conditions and the forward operator are
+        # composed once here so that each solve is one matmul and one addition
+        if options.obs_type == 'obs':
+            forward_matrix_observed = self.forward_matrix_obs
+        else:
+            forward_matrix_observed = self.forward_matrix
+        self.parameter_to_observable_matrix = tf.linalg.matmul(
+                forward_matrix_observed*self.dirichlet_mult_vec, self.mass_matrix)
+        self.parameter_to_observable_offset = tf.linalg.matmul(
+                tf.expand_dims(self.dirichlet_add_vec, 0), forward_matrix_observed,
+                transpose_b=True)
 
-        #=== Generate Measurement Data ===#
+    def solve_pde(self, parameters):
+        #=== Solving PDE and Generating Measurement Data ===#
+        state_obs = tf.linalg.matmul(parameters, self.parameter_to_observable_matrix,
+                                     transpose_b=True) + self.parameter_to_observable_offset
         if self.options.obs_type == 'obs':
-            state_obs = tf.gather(state, self.obs_indices, axis=1)
             return tf.squeeze(state_obs)
         else:
-            return state
+            return state_obs
 
 ###############################################################################
 #                                   Neumann                                   #
@@ -66,20 +71,24 @@ class SolveFEMLinearNeumann:
         self.forward_matrix = forward_matrix
         self.mass_matrix = mass_matrix
 
-    def solve_pde(self, parameters):
-        #=== Solving PDE ===#
-        rhs = tf.linalg.matmul(
-                tf.expand_dims(parameters[0,:], axis=0), tf.transpose(self.mass_matrix))
-        state = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-        for n in range(1, parameters.shape[0]):
-            rhs = tf.linalg.matmul(
-                    tf.expand_dims(parameters[n,:], axis=0), tf.transpose(self.mass_matrix))
-            solution = tf.linalg.matmul(rhs, tf.transpose(self.forward_matrix))
-            state = tf.concat([state, solution], axis=0)
+        #=== Rows of the Forward Operator at the Observation Points ===#
+        if options.obs_type == 'obs':
+            self.forward_matrix_obs = tf.gather(self.forward_matrix, self.obs_indices[:,0],
+                                                axis=0)
+
+        #=== Parameter-to-Observable Map as a Single Matrix ===#
+        if options.obs_type == 'obs':
+            forward_matrix_observed = self.forward_matrix_obs
+        else:
+            forward_matrix_observed = self.forward_matrix
+        self.parameter_to_observable_matrix = tf.linalg.matmul(
+                forward_matrix_observed, self.mass_matrix)
 
-        #=== Generate Measurement Data ===#
+    def solve_pde(self, parameters):
+        #=== Solving PDE and Generating Measurement Data ===#
+        state_obs = tf.linalg.matmul(parameters, self.parameter_to_observable_matrix,
+                                     transpose_b=True)
         if self.options.obs_type == 'obs':
-            state_obs = tf.gather(state, self.obs_indices, axis=1)
             return tf.squeeze(state_obs)
         else:
-            return state
+            return state_obs
@@ -69,26 +69,36 @@ def training(hyperp, options, filepaths,
 
     #=== Non-distributed Training ===#
     if options.distributed_training == 0:
-        #=== Neural Network ===#
-        nn = VAE(hyperp, options,
-                 input_dimensions, latent_dimensions,
-                 kernel_initializer, bias_initializer,
-                 tf.identity)
+        #=== Mixed Precision ===#
+        # The policy in place before training is restored afterwards, also when
+        # training raises, so that it does not carry over to later models
+        global_policy = tf.keras.mixed_precision.global_policy()
+        if options.mixed_precision == True:
+            tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+        try:
+            #=== Neural Network ===#
+            nn = VAE(hyperp, options,
+                     input_dimensions, latent_dimensions,
+                     kernel_initializer, bias_initializer,
+                     tf.identity)
 
-        #=== Optimizer ===#
-        optimizer = tf.keras.optimizers.Adam()
+            #=== Optimizer ===#
+            optimizer = tf.keras.optimizers.Adam()
 
-        #=== Training ===#
-        optimize(hyperp, options, filepaths,
-                 nn, optimizer,
-                 input_and_latent_train, input_and_latent_val, input_and_latent_test,
-                 input_dimensions, latent_dimensions, num_batches_train,
-                 data_dict["noise_regularization_matrix"],
-                 prior_dict["prior_mean"], prior_dict["prior_covariance_inverse"])
+            #=== Training ===#
+            optimize(hyperp, options, filepaths,
+                     nn, optimizer,
+                     input_and_latent_train, input_and_latent_val, input_and_latent_test,
+                     input_dimensions, latent_dimensions, num_batches_train,
+                     data_dict["noise_regularization_matrix"],
+                     prior_dict["prior_mean"], prior_dict["prior_covariance_inverse"])
+        finally:
+            tf.keras.mixed_precision.set_global_policy(global_policy)
 
     #=== Distributed Training ===#
     if options.distributed_training == 1:
-        dist_strategy = tf.distribute.MirroredStrategy()
+        dist_strategy = tf.distribute.MirroredStrategy(
+                cross_device_ops = tf.distribute.NcclAllReduce())
         with dist_strategy.scope():
             #=== Neural Network ===#
             nn = VAE(hyperp, options,
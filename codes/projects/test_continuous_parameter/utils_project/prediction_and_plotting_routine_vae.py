@@ -6,7 +6,7 @@ In preparation for prediction and plotting, this script will:
     3) Instantiate the DataHandler class
     4) Instantiate the neural network
     5) Load the trained neural network weights
-    6) Select and prepare an illustrative test example
+    6) Select and prepare illustrative test examples
     7) Output a prediction of the posterior mean and posterior covariance by
        utilizing the encoder
     8) Draw from the predicted posterior
@@ -29,12 +29,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 plt.ioff() # Turn interactive plotting off
-import scipy.stats as st
 
 # Import src code
 from utils_data.data_handler import DataHandler
-from neural_networks.nn_vae_full import VAE
+from neural_networks.nn_vae_full import VAE, Decoder
 from utils_misc.positivity_constraints import positivity_constraint_log_exp
+from utils_misc.kde_fft import kde_fft
 
 # Import project utilities
 from utils_project.get_forward_operators_tf import load_forward_operator_tf
@@ -54,8 +54,8 @@ def predict_and_plot(hyperp, options, filepaths):
     if options.obs_type == 'obs':
         obs_dimensions = options.num_obs_points
         print('Loading Boundary Indices')
-        df_obs_indices = pd.read_csv(filepaths.project.obs_indices + '.csv')
-        obs_indices = df_obs_indices.to_numpy()
+        obs_indices = np.loadtxt(filepaths.project.obs_indices + '.csv',
+                                 dtype=np.int32, delimiter=',', skiprows=1, ndmin=2)
 
     #=== Data and Latent Dimensions of Autoencoder ===#
     input_dimensions = obs_dimensions
@@ -79,6 +79,25 @@ def predict_and_plot(hyperp, options, filepaths):
              tf.identity)
     nn.load_weights(filepaths.trained_nn)
 
+    #=== Compiled Encoder and Decoder for Inference ===#
+    encode = tf.function(nn.encoder, jit_compile=True,
+            input_signature=[tf.TensorSpec([None, input_dimensions], tf.float32)])
+    if options.model_aware == True:
+        #=== bfloat16 Copy of the Decoder for Drawing Predictions ===#
+        policy = tf.keras.mixed_precision.global_policy()
+        tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+        decoder_bf16 = Decoder(options,
+                               nn.decoder.truncation_layer,
+                               nn.architecture, nn.activations,
+                               None, None,
+                               nn.decoder.last_layer_index)
+        tf.keras.mixed_precision.set_global_policy(policy)
+        decoder_bf16(tf.zeros((1, latent_dimensions), tf.float32))
+        decoder_bf16.set_weights(nn.decoder.get_weights())
+        decode = tf.function(lambda z: tf.cast(decoder_bf16(z), tf.float32),
+                jit_compile=True,
+                input_signature=[tf.TensorSpec([None, latent_dimensions], tf.float32)])
+
     #=== Construct Forward Model ===#
     if options.model_augmented == True:
         forward_operator = load_forward_operator_tf(options, filepaths)
@@ -90,54 +109,64 @@ def predict_and_plot(hyperp, options, filepaths):
             forward_model_solve = forward_model.discrete_exponential
 
     #=== Selecting Samples ===#
-    sample_number = 105
-    parameter_test_sample = np.expand_dims(parameter_test[sample_number,:], 0)
-    state_obs_test_sample = np.expand_dims(state_obs_test[sample_number,:], 0)
+    sample_numbers = [105]
+    parameter_test_samples = parameter_test[sample_numbers,:]
+    state_obs_test_samples = tf.convert_to_tensor(state_obs_test[sample_numbers,:])
 
     #=== Predictions ===#
-    post_mean_pred, log_post_std_pred, post_cov_chol_pred = nn.encoder(state_obs_test_sample)
+    post_mean_pred, log_post_std_pred, post_cov_chol_pred = encode(state_obs_test_samples)
     n_samples = 1000
-    posterior_pred_draws = np.zeros((n_samples, post_mean_pred.shape[1]),
-                                dtype=np.float32)
-    state_obs_pred_draws = np.zeros((n_samples, state_obs_test_sample.shape[1]),
-                                dtype=np.float32)
-    for n in range(0,n_samples):
-        posterior_pred_draws[n,:] = nn.reparameterize(post_mean_pred, post_cov_chol_pred)
+    # post_cov_chol_pred stores each Cholesky factor L column-wise so reshaping
+    # it row-wise gives L^T and the draws mu + Lz are formed as mu + z L^T
+    post_cov_chol_T_pred = tf.reshape(post_cov_chol_pred,
+            (-1, latent_dimensions, latent_dimensions))
+    z = tf.random.normal((len(sample_numbers), n_samples, latent_dimensions),
+                         dtype=tf.float32)
+    posterior_pred_draws = tf.reshape(
+            tf.expand_dims(post_mean_pred, 1) + tf.linalg.matmul(z, post_cov_chol_T_pred),
+            (-1, latent_dimensions))
     if options.model_aware == True:
-        state_obs_pred_draws = nn.decoder(posterior_pred_draws)
+        state_obs_pred_draws = decode(posterior_pred_draws)
     else:
         state_obs_pred_draws = forward_model_solve(posterior_pred_draws)
+    posterior_pred_draws = tf.reshape(posterior_pred_draws,
+            (len(sample_numbers), n_samples, latent_dimensions)).numpy()
+    state_obs_pred_draws = tf.reshape(state_obs_pred_draws,
+            (len(sample_numbers), n_samples, -1)).numpy()
 
     #=== Plotting Prediction ===#
     print('================================')
     print('      Plotting Predictions      ')
     print('================================')
     n_bins = 100
-    for n in range(0, post_mean_pred.shape[1]):
-        #=== Posterior Histogram ===#
-        plt.hist(posterior_pred_draws[:,n], density=True,
-                 range=[-1,10], bins=n_bins)
-        #=== True Parameter Value ===#
-        plt.axvline(parameter_test_sample[0,n], color='r',
-                linestyle='dashed', linewidth=3,
-                label="True Parameter Value")
-        #=== Predicted Posterior Mean ===#
-        plt.axvline(post_mean_pred[0,n], color='b',
-                linestyle='dashed', linewidth=1,
-                label="Predicted Posterior Mean")
-        #=== Probability Density Function ===#
-        mn, mx = plt.xlim()
-        plt.xlim(mn, mx)
-        kde_xs = np.linspace(mn, mx, 301)
-        kde = st.gaussian_kde(posterior_pred_draws[:,n])
-        #=== Title and Labels ===#
-        plt.plot(kde_xs, kde.pdf(kde_xs))
-        plt.legend(loc="upper left")
-        plt.ylabel('Probability')
-        plt.xlabel('Parameter Value')
-        plt.title("Marginal Posterior Parameter_%d"%(n));
-        #=== Save and Close Figure ===#
-        plt.savefig(filepaths.figure_parameter_pred + '_%d'%(n))
-        plt.close()
+    fig, ax = plt.subplots()
+    for m, sample_number in enumerate(sample_numbers):
+        for n in range(0, latent_dimensions):
+            ax.clear()
+            #=== Posterior Histogram ===#
+            ax.hist(posterior_pred_draws[m,:,n], density=True,
+                    range=[-1,10], bins=n_bins)
+            #=== True Parameter Value ===#
+            ax.axvline(parameter_test_samples[m,n], color='r',
+                    linestyle='dashed', linewidth=3,
+                    label="True Parameter Value")
+            #=== Predicted Posterior Mean ===#
+            ax.axvline(post_mean_pred[m,n], color='b',
+                    linestyle='dashed', linewidth=1,
+                    label="Predicted Posterior Mean")
+            #=== Probability Density Function ===#
+            mn, mx = ax.get_xlim()
+            ax.set_xlim(mn, mx)
+            kde_xs = np.linspace(mn, mx, 301)
+            #=== Title and Labels ===#
+            ax.plot(kde_xs, kde_fft(posterior_pred_draws[m,:,n], kde_xs))
+            ax.legend(loc="upper left")
+            ax.set_ylabel('Probability')
+            ax.set_xlabel('Parameter Value')
+            ax.set_title("Marginal Posterior Parameter_%d"%(n));
+            #=== Save Figure ===#
+            fig.savefig(filepaths.figure_parameter_pred + '_sample_%d_%d'%(sample_number, n),
+                        dpi=80)
+    plt.close(fig)
 
     print('Predictions plotted')
@@ -57,8 +57,8 @@ def predict_and_plot(hyperp, options, filepaths):
     if options.obs_type == 'obs':
         obs_dimensions = options.num_obs_points
         print('Loading Boundary Indices')
-        df_obs_indices = pd.read_csv(filepaths.project.obs_indices + '.csv')
-        obs_indices = df_obs_indices.to_numpy()
+        obs_indices = np.loadtxt(filepaths.project.obs_indices + '.csv',
+                                 dtype=np.int32, delimiter=',', skiprows=1, ndmin=2)
 
     #=== Data and Latent Dimensions of Autoencoder ===#
     input_dimensions = obs_dimensions
@@ -93,22 +93,20 @@ def predict_and_plot(hyperp, options, filepaths):
 
     #=== Selecting Samples ===#
     sample_number = 4
-    parameter_test_sample = np.expand_dims(parameter_test[sample_number,:], 0)
-    state_obs_test_sample = np.expand_dims(state_obs_test[sample_number,:], 0)
+    parameter_test_sample = parameter_test[sample_number:sample_number+1,:]
+    state_obs_test_sample = state_obs_test[sample_number:sample_number+1,:]
 
     #=== Predictions ===#
     post_mean_pred, log_post_std_pred, post_cov_chol_pred = nn.encoder(state_obs_test_sample)
     n_samples = 1000
-    posterior_pred_draws = np.zeros((n_samples, post_mean_pred.shape[1]),
-                                dtype=np.float32)
-    state_obs_pred_draws = np.zeros((n_samples, state_obs_test_sample.shape[1]),
-                                dtype=np.float32)
-    for n in range(0,n_samples):
-        posterior_pred_draws[n,:] = nn.reparameterize(post_mean_pred, post_cov_chol_pred)
+    posterior_pred_draws =\
+            nn.reparameterize(post_mean_pred, post_cov_chol_pred, n_samples)
     if options.model_aware == True:
         state_obs_pred_draws = nn.decoder(posterior_pred_draws)
     else:
         state_obs_pred_draws = forward_model_solve(posterior_pred_draws)
+    posterior_pred_draws = posterior_pred_draws.numpy()
+    state_obs_pred_draws = state_obs_pred_draws.numpy()
 
     #=== Plotting Prediction ===#
     print('================================')
@@ -13,23 +13,19 @@ class SolveForward1D:
         self.mesh = np.linspace(0, 1, options.mesh_dimensions, endpoint = True)
         self.forward_operator = forward_operator
 
+        #=== Rows of the Forward Operator at the Observation Points ===#
+        if options.obs_type == 'obs':
+            self.forward_operator_obs = tf.gather(self.forward_operator, self.obs_indices[:,0],
+                                                  axis=0)
+
 ###############################################################################
 #                               Continuous Linear                             #
 ###############################################################################
     def continuous_linear(self, parameters):
-        #=== Form State Batch ===#
-        state = tf.expand_dims(
-                tf.tensordot(self.forward_operator, tf.transpose(parameters[0,:]), axes=1),
-                axis=0)
-        for m in range(1, parameters.shape[0]):
-            solution = tf.expand_dims(
-                       tf.tensordot(self.forward_operator, tf.transpose(parameters[m,:]), axes=1),
-                       axis=0)
-            state = tf.concat([state, solution], axis=0)
-
         #=== Generate Measurement Data ===#
         if self.options.obs_type == 'obs':
-            state_obs = tf.gather(state, self.obs_indices, axis=1)
+            state_obs = tf.linalg.matmul(parameters, self.forward_operator_obs,
+                                         transpose_b=True)
             return tf.squeeze(state_obs)
         else:
-            return state
+            return tf.linalg.matmul(parameters, self.forward_operator, transpose_b=True)
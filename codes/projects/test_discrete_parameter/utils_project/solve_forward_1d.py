@@ -13,19 +13,22 @@ class SolveForward1D:
         self.mesh = np.linspace(0, 1, options.mesh_dimensions, endpoint = True)
         self.forward_operator = forward_operator
 
+        #=== Rows of the Forward Operator at the Observation Points ===#
+        if options.obs_type == 'obs':
+            self.forward_operator_obs = tf.gather(self.forward_operator, self.obs_indices[:,0],
+                                                  axis=0)
+
 ###############################################################################
 #                             Discrete Polynomial                             #
 ###############################################################################
     def discrete_polynomial(self, parameters):
-        #=== Form State Batch ===#
-        state = tf.linalg.matmul(parameters, tf.transpose(self.forward_operator))
-
         #=== Generate Measurement Data ===#
         if self.options.obs_type == 'obs':
-            state_obs = tf.gather(state, self.obs_indices, axis=1)
+            state_obs = tf.linalg.matmul(parameters, self.forward_operator_obs,
+                                         transpose_b=True)
             return tf.squeeze(state_obs)
         else:
-            return state
+            return tf.linalg.matmul(parameters, self.forward_operator, transpose_b=True)
 
 ###############################################################################
 #                             Discrete Exponential                            #
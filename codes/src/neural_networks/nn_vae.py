@@ -66,7 +66,7 @@ class VAE(tf.keras.Model):
 
     #=== Variational Autoencoder Propagation ===#
     def reparameterize(self, mean, log_var):
-        eps = tf.random.normal(shape=mean.shape)
+        eps = tf.random.normal(shape=tf.shape(mean))
         return self.positivity_constraint(mean + eps*tf.exp(log_var*0.5))
 
     def call(self, X):
@@ -99,6 +99,8 @@ class Encoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == truncation_layer\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_encoder.append(hidden_layer_encoder)
 
@@ -135,6 +137,8 @@ class Decoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == last_layer_index\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_decoder.append(hidden_layer_decoder)
 
@@ -66,10 +66,14 @@ class VAE(tf.keras.Model):
                                    len(self.architecture) - 1)
 
     #=== Variational Autoencoder Propagation ===#
-    def reparameterize(self, mean, post_cov_chol):
-        eps = tf.random.normal(shape=(mean.shape[1]**2,mean.shape[1]))
+    def reparameterize(self, mean, post_cov_chol, num_samples = 1):
+        # num_samples > 1 draws that many samples of each posterior in one
+        # matmul; the draws of each posterior are stacked along the first axis
+        eps = tf.random.normal(shape=(mean.shape[1]**2,num_samples*mean.shape[1]))
+        draws = tf.reshape(tf.matmul(post_cov_chol,eps),
+                           (-1,num_samples,mean.shape[1]))
         return self.positivity_constraint(
-                    mean + tf.matmul(post_cov_chol,eps))
+                    tf.reshape(tf.expand_dims(mean,1) + draws, (-1,mean.shape[1])))
 
     def call(self, X):
         post_mean, log_post_std, post_cov_chol = self.encoder(X)
@@ -98,7 +102,6 @@ class Encoder(tf.keras.layers.Layer):
                                 tf.transpose(
                                     tf.cast(np.tril(np.ones(latent_dimensions), -1), tf.float32)),
                                 (latent_dimensions**2,1))
-        self.ones = tf.ones([latent_dimensions,1], tf.float32)
         self.truncation_layer = truncation_layer
         self.hidden_layers_encoder = [] # This will be a list of layers
 
@@ -108,6 +111,8 @@ class Encoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == truncation_layer\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_encoder.append(hidden_layer_encoder)
 
@@ -126,12 +131,8 @@ class Encoder(tf.keras.layers.Layer):
 
     def form_post_cov_chol(self, log_post_std, post_cov_lowtri):
         return tf.multiply(post_cov_lowtri, tf.transpose(self.vec_lowtri_ones)) +\
-               tf.multiply(tf.linalg.LinearOperatorKronecker(
-                       [tf.linalg.LinearOperatorFullMatrix(tf.transpose(self.ones)),
-                       tf.linalg.LinearOperatorFullMatrix(tf.math.exp(log_post_std))]).to_dense(),
-                       tf.transpose(
-                           tf.reshape(tf.eye(self.latent_dimensions, dtype=tf.float32),
-                               (self.latent_dimensions**2,1))))
+               tf.reshape(tf.linalg.diag(tf.math.exp(log_post_std)),
+                          (-1, self.latent_dimensions**2))
 
 ###############################################################################
 #                                  Decoder                                    #
@@ -156,6 +157,8 @@ class Decoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == last_layer_index\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_decoder.append(hidden_layer_decoder)
 
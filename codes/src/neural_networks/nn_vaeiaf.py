@@ -66,6 +66,7 @@ class VAEIAF(tf.keras.Model):
                                self.architecture, self.activations,
                                kernel_initializer, bias_initializer)
         self.iaf_chain_encoder = IAFChainEncoder(options.iaf_lstm_update,
+                                                 options.iaf_recompute_grad,
                                                  hyperp.num_iaf_transforms,
                                                  hyperp.num_hidden_nodes_iaf,
                                                  hyperp.activation_iaf,
@@ -111,6 +112,8 @@ class Encoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == truncation_layer\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_encoder.append(hidden_layer_encoder)
 
@@ -147,6 +150,8 @@ class Decoder(tf.keras.layers.Layer):
                                                          use_bias = True,
                                                          kernel_initializer = kernel_initializer,
                                                          bias_initializer = bias_initializer,
+                                                         dtype = 'float32' if l == last_layer_index\
+                                                                 else None,
                                                          name = "W" + str(l))
             self.hidden_layers_decoder.append(hidden_layer_decoder)
 
@@ -165,14 +170,18 @@ class Decoder(tf.keras.layers.Layer):
 ###############################################################################
 class IAFChainEncoder(tf.keras.layers.Layer):
     def __init__(self, iaf_lstm_update_flag,
+                 iaf_recompute_grad_flag,
                  num_iaf_transforms,
                  hidden_units,
                  activation,
                  kernel_initializer, bias_initializer):
-        super(IAFChainPosterior, self).__init__()
+        # The flow is kept in float32 under a mixed precision policy since the
+        # log determinants of the chain lose too much accuracy in float16
+        super(IAFChainEncoder, self).__init__(dtype = 'float32')
 
         #=== Attributes ===#
         self.iaf_lstm_update_flag = iaf_lstm_update_flag
+        self.iaf_recompute_grad_flag = iaf_recompute_grad_flag
         self.num_iaf_transforms = num_iaf_transforms
         self.hidden_units = hidden_units
         self.activation = activation
@@ -194,6 +203,7 @@ class IAFChainEncoder(tf.keras.layers.Layer):
                                                   kernel_initializer = self.kernel_initializer,
                                                   bias_initializer = self.bias_initializer,
                                                   lstm_flag = self.iaf_lstm_update_flag,
+                                                  recompute_grad_flag = self.iaf_recompute_grad_flag,
                                                   name = "IAF_W" + str(i)))))
             bijectors_list.append(tfb.Permute(list(reversed(range(latent_dimensions)))))
         self.iaf_chain = tfb.Chain(bijectors_list)
@@ -213,6 +223,8 @@ class IAFChainEncoder(tf.keras.layers.Layer):
         sample_draw = self.distribution.sample()
         self.foo = self.distribution.variables # for some reason,
                                                # this is required to register trainable variables
+        if sample_flag == True and infer_flag == True:
+            return sample_draw, self.distribution.log_prob(sample_draw)
         if sample_flag == True:
             return sample_draw
         if infer_flag == True:
@@ -228,19 +240,38 @@ class Made(tf.keras.layers.Layer):
                  activation,
                  kernel_initializer, bias_initializer,
                  lstm_flag,
+                 recompute_grad_flag,
                  name):
-        super(Made, self).__init__(name = name)
+        super(Made, self).__init__(name = name, dtype = 'float32')
 
         self.lstm_flag = lstm_flag
+        self.recompute_grad_flag = recompute_grad_flag
         self.network = tfb.AutoregressiveNetwork(params = params,
                                                  event_shape = event_shape,
                                                  hidden_units = [hidden_units, hidden_units],
                                                  activation = activation,
                                                  kernel_initializer = kernel_initializer,
-                                                 bias_initializer = bias_initializer)
+                                                 bias_initializer = bias_initializer,
+                                                 dtype = 'float32')
+
+        #=== Gradient Checkpointing ===#
+        # The activations of the network are not stored for backpropagation
+        # and are instead recomputed when the gradient is formed. This only
+        # reduces memory when the calling step is not compiled with XLA, which
+        # would merge the recomputation with the original forward pass
+        self.network_recompute_grad = tf.recompute_grad(self.network)
+
+    def build(self, input_shape):
+        # The weights are created here so that they are not created within
+        # the recomputed function
+        self.network.build(input_shape)
+        super(Made, self).build(input_shape)
 
     def call(self, X):
-        mean, log_var = tf.unstack(self.network(X), num=2, axis=-1)
+        if self.recompute_grad_flag == True:
+            mean, log_var = tf.unstack(self.network_recompute_grad(X), num=2, axis=-1)
+        else:
+            mean, log_var = tf.unstack(self.network(X), num=2, axis=-1)
         if self.lstm_flag == False:
             return mean, tf.math.tanh(log_var)
         else:
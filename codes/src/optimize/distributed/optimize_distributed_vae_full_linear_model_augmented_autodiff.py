@@ -78,26 +78,17 @@ def optimize_distributed(dist_strategy,
         prior_mean, prior_cov_inv,
         forward_matrix, solve_forward_model):
 
-    #=== Kronecker Product of Identity and Prior Covariance Inverse ===#
-    identity_otimes_prior_cov_inv =\
-            tf.linalg.LinearOperatorKronecker(
-                    [tf.linalg.LinearOperatorFullMatrix(tf.eye(latent_dimension)),
-                    tf.linalg.LinearOperatorFullMatrix(prior_cov_inv)])
-
-    #=== Kronecker Product of Identity and Likelihood Matrix ===#
+    #=== Likelihood Matrix ===#
+    # The noise regularization matrix is diagonal and so it is applied by
+    # scaling the rows of the observed forward matrix
     if measurement_matrix.shape == (1,1):
-        likelihood_matrix = tf.linalg.matmul(tf.transpose(forward_matrix),
-                                    noise_regularization_matrix*forward_matrix)
+        measured_forward_matrix = forward_matrix
     else:
-        likelihood_matrix = tf.linalg.matmul(
-                                tf.transpose(tf.linalg.matmul(measurement_matrix,forward_matrix)),
-                                tf.linalg.matmul(
-                                    tf.linalg.diag(tf.squeeze(noise_regularization_matrix)),
-                                    tf.linalg.matmul(measurement_matrix,forward_matrix)))
-    identity_otimes_likelihood_matrix =\
-            tf.linalg.LinearOperatorKronecker(
-                    [tf.linalg.LinearOperatorFullMatrix(tf.eye(latent_dimension)),
-                    tf.linalg.LinearOperatorFullMatrix(likelihood_matrix)])
+        measured_forward_matrix = tf.linalg.matmul(measurement_matrix, forward_matrix)
+    likelihood_matrix = tf.linalg.matmul(
+            measured_forward_matrix,
+            tf.reshape(noise_regularization_matrix, [-1,1])*measured_forward_matrix,
+            transpose_a = True)
 
     #=== Check Number of Parallel Computations and Set Global Batch Size ===#
     print('Number of Replicas in Sync: %d' %(dist_strategy.num_replicas_in_sync))
@@ -139,21 +130,21 @@ def optimize_distributed(dist_strategy,
 
                 unscaled_replica_batch_loss_train_vae =\
                         loss_trace_likelihood(batch_post_cov_chol_train,
-                                identity_otimes_likelihood_matrix,
+                                likelihood_matrix,
                                 1) +\
                         loss_diagonal_weighted_penalized_difference(
                                 batch_input_train, batch_input_pred_forward_model_train,
                                 noise_regularization_matrix,
                                 1)
-                unscaled_replica_batch_loss_train_kld =\
+                unscaled_replica_batch_loss_train_kld, batch_two_sum_log_post_std_train =\
                         loss_kld_full(
                                 batch_post_mean_train, batch_log_post_std_train,
                                 batch_post_cov_chol_train,
-                                prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                                prior_mean, prior_cov_inv,
                                 1)
                 unscaled_replica_batch_loss_train_posterior =\
                         (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                        2*tf.reduce_sum(batch_log_post_std_train,axis=1) +\
+                        batch_two_sum_log_post_std_train +\
                         loss_weighted_post_cov_full_penalized_difference(
                                 batch_latent_train, batch_post_mean_train,
                                 batch_post_cov_chol_train,
@@ -168,33 +159,31 @@ def optimize_distributed(dist_strategy,
 
             gradients = tape.gradient(scaled_replica_batch_loss_train, nn.trainable_variables)
             optimizer.apply_gradients(zip(gradients, nn.trainable_variables))
+            metrics.mean_loss_train_epoch(unscaled_replica_batch_loss_train)
             metrics.mean_loss_train_vae(-unscaled_replica_batch_loss_train_vae)
             metrics.mean_loss_train_encoder(unscaled_replica_batch_loss_train_kld)
             metrics.mean_loss_train_posterior(unscaled_replica_batch_loss_train_posterior)
 
-            return scaled_replica_batch_loss_train
-
         @tf.function
         def dist_train_step(batch_input_train, batch_latent_train):
-            per_replica_losses = dist_strategy.experimental_run_v2(
+            dist_strategy.experimental_run_v2(
                     train_step, args=(
                         batch_input_train, batch_latent_train))
-            return dist_strategy.reduce(tf.distribute.ReduceOp.SUM, per_replica_losses, axis=None)
 
         #=== Validation Step ===#
         def val_step(batch_input_val, batch_latent_val):
             batch_post_mean_val, batch_log_post_std_val, batch_post_cov_chol_val\
                     = nn.encoder(batch_input_val)
 
-            unscaled_replica_batch_loss_val_kld =\
+            unscaled_replica_batch_loss_val_kld, batch_two_sum_log_post_std_val =\
                     loss_kld_full(
                             batch_post_mean_val, batch_log_post_std_val,
                             batch_post_cov_chol_val,
-                            prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                            prior_mean, prior_cov_inv,
                             1)
             unscaled_replica_batch_loss_val_posterior =\
                     (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                    2*tf.reduce_sum(batch_log_post_std_val,axis=1) +\
+                    batch_two_sum_log_post_std_val +\
                     loss_weighted_post_cov_full_penalized_difference(
                             batch_latent_val, batch_post_mean_val,
                             batch_post_cov_chol_val,
@@ -218,15 +207,15 @@ def optimize_distributed(dist_strategy,
             batch_post_mean_test, batch_log_post_std_test, batch_post_cov_chol_test\
                     = nn.encoder(batch_input_test)
 
-            unscaled_replica_batch_loss_test_kld =\
+            unscaled_replica_batch_loss_test_kld, batch_two_sum_log_post_std_test =\
                     loss_kld_full(
                             batch_post_mean_test, batch_log_post_std_test,
                             batch_post_cov_chol_test,
-                            prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                            prior_mean, prior_cov_inv,
                             1)
             unscaled_replica_batch_loss_test_posterior =\
                     (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                    2*tf.reduce_sum(batch_log_post_std_test,axis=1) +\
+                    batch_two_sum_log_post_std_test +\
                     loss_weighted_post_cov_full_penalized_difference(
                             batch_latent_test, batch_post_mean_test,
                             batch_post_cov_chol_test,
@@ -261,17 +250,15 @@ def optimize_distributed(dist_strategy,
         print('Optimizing %d batches of size %d:' %(num_batches_train, hyperp.batch_size))
         start_time_epoch = time.time()
         batch_counter = 0
-        total_loss_train = 0
         for batch_input_train, batch_latent_train in dist_input_and_latent_train:
             start_time_batch = time.time()
             #=== Compute Train Step ===#
-            batch_loss_train = dist_train_step(batch_input_train, batch_latent_train)
-            total_loss_train += batch_loss_train
+            dist_train_step(batch_input_train, batch_latent_train)
             elapsed_time_batch = time.time() - start_time_batch
             if batch_counter  == 0:
                 print('Time per Batch: %.4f' %(elapsed_time_batch))
             batch_counter += 1
-        metrics.mean_loss_train = total_loss_train/batch_counter
+        metrics.mean_loss_train = metrics.mean_loss_train_epoch.result()
 
         #=== Computing Validation Metrics ===#
         for batch_input_val, batch_latent_val in dist_input_and_latent_val:
@@ -68,12 +68,6 @@ def optimize_distributed(dist_strategy,
         noise_regularization_matrix,
         prior_mean, prior_cov_inv):
 
-    #=== Kronecker Product of Identity and Prior Covariance Inverse ===#
-    identity_otimes_prior_cov_inv =\
-            tf.linalg.LinearOperatorKronecker(
-                    [tf.linalg.LinearOperatorFullMatrix(tf.eye(latent_dimension)),
-                    tf.linalg.LinearOperatorFullMatrix(prior_cov_inv)])
-
     #=== Check Number of Parallel Computations and Set Global Batch Size ===#
     print('Number of Replicas in Sync: %d' %(dist_strategy.num_replicas_in_sync))
 
@@ -116,15 +110,15 @@ def optimize_distributed(dist_strategy,
                                 batch_input_train, batch_likelihood_train,
                                 noise_regularization_matrix,
                                 1)
-                unscaled_replica_batch_loss_train_kld =\
+                unscaled_replica_batch_loss_train_kld, batch_two_sum_log_post_var_train =\
                         loss_kld_full(
                                 batch_post_mean_train, batch_log_post_var_train,
                                 batch_post_cov_chol_train,
-                                prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                                prior_mean, prior_cov_inv,
                                 1)
                 unscaled_replica_batch_loss_train_posterior =\
                         (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                        2*tf.reduce_sum(batch_log_post_var_train,axis=1) +\
+                        batch_two_sum_log_post_var_train +\
                         loss_weighted_post_cov_full_penalized_difference(
                                 batch_latent_train, batch_post_mean_train,
                                 batch_post_cov_chol_train,
@@ -139,17 +133,15 @@ def optimize_distributed(dist_strategy,
 
             gradients = tape.gradient(scaled_replica_batch_loss_train, nn.trainable_variables)
             optimizer.apply_gradients(zip(gradients, nn.trainable_variables))
+            metrics.mean_loss_train_epoch(unscaled_replica_batch_loss_train)
             metrics.mean_loss_train_vae(unscaled_replica_batch_loss_train_vae)
             metrics.mean_loss_train_encoder(unscaled_replica_batch_loss_train_kld)
             metrics.mean_loss_train_posterior(unscaled_replica_batch_loss_train_posterior)
 
-            return scaled_replica_batch_loss_train
-
         @tf.function
         def dist_train_step(batch_input_train, batch_latent_train):
-            per_replica_losses = dist_strategy.experimental_run_v2(
+            dist_strategy.experimental_run_v2(
                     train_step, args=(batch_input_train, batch_latent_train))
-            return dist_strategy.reduce(tf.distribute.ReduceOp.SUM, per_replica_losses, axis=None)
 
         #=== Validation Step ===#
         def val_step(batch_input_val, batch_latent_val):
@@ -162,15 +154,15 @@ def optimize_distributed(dist_strategy,
                             batch_input_val, batch_likelihood_val,
                             noise_regularization_matrix,
                             1)
-            unscaled_replica_batch_loss_val_kld =\
+            unscaled_replica_batch_loss_val_kld, batch_two_sum_log_post_var_val =\
                     loss_kld_full(
                             batch_post_mean_val, batch_log_post_var_val,
                             batch_post_cov_chol_val,
-                            prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                            prior_mean, prior_cov_inv,
                             1)
             unscaled_replica_batch_loss_val_posterior =\
                 (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                2*tf.reduce_sum(batch_log_post_var_val,axis=1) +\
+                batch_two_sum_log_post_var_val +\
                 loss_weighted_post_cov_full_penalized_difference(
                         batch_latent_val, batch_post_mean_val,
                         batch_post_cov_chol_val,
@@ -203,15 +195,15 @@ def optimize_distributed(dist_strategy,
                             batch_input_test, batch_likelihood_test,
                             noise_regularization_matrix,
                             1)
-            unscaled_replica_batch_loss_test_kld =\
+            unscaled_replica_batch_loss_test_kld, batch_two_sum_log_post_var_test =\
                     loss_kld_full(
                             batch_post_mean_test, batch_log_post_var_test,
                             batch_post_cov_chol_test,
-                            prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                            prior_mean, prior_cov_inv,
                             1)
             unscaled_replica_batch_loss_test_posterior =\
                     (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                    2*tf.reduce_sum(batch_log_post_var_test,axis=1) +\
+                    batch_two_sum_log_post_var_test +\
                     loss_weighted_post_cov_full_penalized_difference(
                             batch_latent_test, batch_post_mean_test,
                             batch_post_cov_chol_test,
@@ -252,18 +244,15 @@ def optimize_distributed(dist_strategy,
         print('Optimizing %d batches of size %d:' %(num_batches_train, hyperp.batch_size))
         start_time_epoch = time.time()
         batch_counter = 0
-        total_loss_train = 0
         for batch_input_train, batch_latent_train in dist_input_and_latent_train:
             start_time_batch = time.time()
             #=== Compute Train Step ===#
-            batch_loss_train = dist_train_step(
-                    batch_input_train, batch_latent_train)
-            total_loss_train += batch_loss_train
+            dist_train_step(batch_input_train, batch_latent_train)
             elapsed_time_batch = time.time() - start_time_batch
             if batch_counter  == 0:
                 print('Time per Batch: %.4f' %(elapsed_time_batch))
             batch_counter += 1
-        metrics.mean_loss_train = total_loss_train/batch_counter
+        metrics.mean_loss_train = metrics.mean_loss_train_epoch.result()
 
         #=== Computing Validation Metrics ===#
         for batch_input_val, batch_latent_val in dist_input_and_latent_val:
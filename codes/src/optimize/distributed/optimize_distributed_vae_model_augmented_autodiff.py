@@ -133,18 +133,16 @@ def optimize_distributed(dist_strategy,
 
             gradients = tape.gradient(scaled_replica_batch_loss_train, nn.trainable_variables)
             optimizer.apply_gradients(zip(gradients, nn.trainable_variables))
+            metrics.mean_loss_train_epoch(unscaled_replica_batch_loss_train)
             metrics.mean_loss_train_vae(-unscaled_replica_batch_loss_train_vae)
             metrics.mean_loss_train_encoder(unscaled_replica_batch_loss_train_kld)
             metrics.mean_loss_train_posterior(unscaled_replica_batch_loss_train_posterior)
 
-            return scaled_replica_batch_loss_train
-
         @tf.function
         def dist_train_step(batch_input_train, batch_latent_train):
-            per_replica_losses = dist_strategy.experimental_run_v2(
+            dist_strategy.experimental_run_v2(
                     train_step, args=(
                         batch_input_train, batch_latent_train))
-            return dist_strategy.reduce(tf.distribute.ReduceOp.SUM, per_replica_losses, axis=None)
 
         #=== Validation Step ===#
         def val_step(batch_input_val, batch_latent_val):
@@ -222,17 +220,15 @@ def optimize_distributed(dist_strategy,
         print('Optimizing %d batches of size %d:' %(num_batches_train, hyperp.batch_size))
         start_time_epoch = time.time()
         batch_counter = 0
-        total_loss_train = 0
         for batch_input_train, batch_latent_train in dist_input_and_latent_train:
             start_time_batch = time.time()
             #=== Compute Train Step ===#
-            batch_loss_train = dist_train_step(batch_input_train, batch_latent_train)
-            total_loss_train += batch_loss_train
+            dist_train_step(batch_input_train, batch_latent_train)
             elapsed_time_batch = time.time() - start_time_batch
             if batch_counter  == 0:
                 print('Time per Batch: %.4f' %(elapsed_time_batch))
             batch_counter += 1
-        metrics.mean_loss_train = total_loss_train/batch_counter
+        metrics.mean_loss_train = metrics.mean_loss_train_epoch.result()
 
         #=== Computing Validation Metrics ===#
         for batch_input_val, batch_latent_val in dist_input_and_latent_val:
@@ -9,14 +9,21 @@ In preparation for optimization, this script will:
     4) Build the neural network and display a summary
 
 Then, per epoch, this script will:
-    1) Using train_step() form the batched gradient using the training set
-    2) Using val_step() evaluate the metrics on the validation set
-    3) Using test_step() evaluate the metrics on the testing set
+    1) Using train_step() form the batched gradient using the training set;
+       the loop over the training batches is traced into the graph of
+       train_epoch()
+    2) Using val_step() evaluate the metrics on the validation set; the loop
+       over the validation batches is traced into the graph of dist_val_step()
+    3) Using test_step() evaluate the metrics on the testing set; the loop
+       over the testing batches is traced into the graph of dist_test_step()
     4) Update the Tensorboard metrics
     5) Update the storage arrays
     6) Display and reset the current metric values
     7) Output the metrics, current values of the neural network weights and
-       dump the hyperp and options dictionaries into uq-vae/trained_nns/
+       dump the hyperp and options dictionaries into uq-vae/trained_nns/.
+       The weights are copied to the host before training continues but the
+       files are written in the background so that the next epoch is not
+       stalled by the disk
 
 Inputs:
     - dist_strategy: the distribution strategy used for parallelized optimization
@@ -25,7 +32,9 @@ Inputs:
     - filepaths: instance of the FilePaths class storing the default strings for
                  importing and exporting required objects.
     - nn: the neural network to be trained
-    - optimizer: Tensorflow optimizer to be used
+    - optimizer: Tensorflow optimizer to be used. If options.mixed_precision
+                 is True, this must be a LossScaleOptimizer and nn must be
+                 constructed under the mixed_float16 policy
     - input_and_latent_: batched train, validation and testing datasets
     - input_dimension: dimension of the input layer of the neural network
     - latent_dimension: dimension of the model posterior mean estimate output by
@@ -43,12 +52,14 @@ sys.path.append('../..')
 import shutil # for deleting directories
 import os
 import time
+import copy
+from concurrent.futures import ThreadPoolExecutor
 
 import tensorflow as tf
 import numpy as np
 
 # Import src code
-from utils_training.metrics_vae import Metrics
+from utils_training.metrics_distributed_vae import Metrics
 from utils_io.config_io import dump_attrdict_as_yaml
 from utils_training.functionals import\
         loss_penalized_difference, loss_diagonal_weighted_penalized_difference, relative_error
@@ -68,12 +79,42 @@ def optimize_distributed(dist_strategy,
 
     #=== Check Number of Parallel Computations and Set Global Batch Size ===#
     print('Number of Replicas in Sync: %d' %(dist_strategy.num_replicas_in_sync))
+    # The datasets are batched with hyperp.batch_size before being split
+    # across the replicas and so each replica's summed loss is scaled by the
+    # full batch size
+    global_batch_size = hyperp.batch_size
+
+    #=== Input Pipeline Options ===#
+    dataset_options = tf.data.Options()
+    dataset_options.experimental_deterministic = False
+    dataset_options.experimental_optimization.map_and_batch_fusion = True
+    dataset_options.experimental_optimization.map_parallelization = True
+    dataset_options.experimental_optimization.parallel_batch = True
+    dataset_options.experimental_threading.private_threadpool_size = os.cpu_count()
+    dataset_options.experimental_threading.max_intra_op_parallelism = 1
+    input_options = tf.distribute.InputOptions(experimental_prefetch_to_device = True)
+
+    #=== Apply Input Pipeline Options ===#
+    # The batches are already prefetched on the host by
+    # form_train_val_test_tf_batches and are then prefetched to the devices by
+    # the distributed datasets
+    input_and_latent_train = input_and_latent_train.with_options(dataset_options)
+    input_and_latent_val = input_and_latent_val.with_options(dataset_options)
+    input_and_latent_test = input_and_latent_test.with_options(dataset_options)
 
     #=== Distribute Data ===#
-    dist_input_and_latent_train =\
-            dist_strategy.experimental_distribute_dataset(input_and_latent_train)
-    dist_input_and_latent_val = dist_strategy.experimental_distribute_dataset(input_and_latent_val)
-    dist_input_and_latent_test = dist_strategy.experimental_distribute_dataset(input_and_latent_test)
+    dist_input_and_latent_train = dist_strategy.experimental_distribute_dataset(
+            input_and_latent_train, input_options)
+    dist_input_and_latent_val = dist_strategy.experimental_distribute_dataset(
+            input_and_latent_val, input_options)
+    dist_input_and_latent_test = dist_strategy.experimental_distribute_dataset(
+            input_and_latent_test, input_options)
+
+    #=== Loss Functional Objects as Constant Tensors Captured by the Steps ===#
+    noise_regularization_matrix = tf.constant(noise_regularization_matrix, dtype=tf.float32)
+    prior_mean = tf.constant(prior_mean, dtype=tf.float32)
+    prior_covariance_cholesky_inverse = tf.constant(prior_covariance_cholesky_inverse,
+                                                    dtype=tf.float32)
 
     #=== Metrics ===#
     metrics = Metrics(dist_strategy)
@@ -87,34 +128,56 @@ def optimize_distributed(dist_strategy,
         shutil.rmtree(filepaths.directory_tensorboard)
     summary_writer = tf.summary.create_file_writer(filepaths.directory_tensorboard)
 
+    #=== Background Saving of Checkpoints ===#
+    # The storage arrays are replaced, not modified, on each update and so a
+    # shallow copy of the metrics is a snapshot of the metrics at save time
+    # The future of the previous save is resolved before the next save so that
+    # any error raised in the background is re-raised on the training thread
+    executor = ThreadPoolExecutor(max_workers=1)
+    save_future = None
+    checkpoint_options = tf.train.CheckpointOptions(
+            experimental_enable_async_checkpoint = True)
+    def save_metrics_and_dictionaries(metrics_snapshot):
+        metrics_snapshot.save_metrics(filepaths)
+        dump_attrdict_as_yaml(hyperp, filepaths.directory_trained_nn, 'hyperp')
+        dump_attrdict_as_yaml(options, filepaths.directory_trained_nn, 'options')
+
     #=== Display Neural Network Architecture ===#
     with dist_strategy.scope():
         nn.build((hyperp.batch_size, input_dimensions))
         nn.summary()
 
+    #=== Trainable Variables Collected Once After the Network is Built ===#
+    trainable_variables = nn.trainable_variables
+
 ###############################################################################
 #                   Training, Validation and Testing Step                     #
 ###############################################################################
     with dist_strategy.scope():
         #=== Training Step ===#
-        def train_step(batch_input_train, batch_latent_train):
+        # The replica local losses and gradients are compiled with XLA while
+        # apply_gradients, which synchronizes the gradients across replicas,
+        # is kept outside of the compiled function. With IAF gradient
+        # checkpointing XLA is not used for this step since XLA would merge the
+        # recomputed forward pass with the original one and keep the
+        # activations that the checkpointing is meant to free
+        @tf.function(jit_compile = not options.iaf_recompute_grad)
+        def train_losses_and_gradients(batch_input_train, batch_latent_train):
             with tf.GradientTape() as tape:
-                batch_likelihood_train = nn(batch_input_train)
                 batch_post_mean_train, batch_log_post_var_train = nn.encoder(batch_input_train)
-                batch_posterior_sample_train = nn.iaf_chain_posterior((batch_post_mean_train,
-                                                                       batch_log_post_var_train),
-                                                                       sample_flag = True,
-                                                                       infer_flag = False)
+                batch_post_mean_train = tf.cast(batch_post_mean_train, tf.float32)
+                batch_log_post_var_train = tf.cast(batch_log_post_var_train, tf.float32)
+                batch_posterior_sample_train, unscaled_replica_batch_loss_train_iaf_posterior =\
+                        nn.iaf_chain_encoder((batch_post_mean_train, batch_log_post_var_train),
+                                             sample_flag = True,
+                                             infer_flag = True)
+                batch_likelihood_train = tf.cast(nn.decoder(
+                        nn.positivity_constraint(batch_posterior_sample_train)), tf.float32)
 
                 unscaled_replica_batch_loss_train_vae =\
                         loss_diagonal_weighted_penalized_difference(
                                 batch_input_train, batch_likelihood_train,
                                 noise_regularization_matrix, 1)
-                unscaled_replica_batch_loss_train_iaf_posterior =\
-                        nn.iaf_chain_posterior((batch_post_mean_train,
-                                                batch_log_post_var_train,
-                                                sample_flag = False,
-                                                infer_flag = True)
                 unscaled_replica_batch_loss_train_prior =\
                         loss_diagonal_weighted_penalized_difference(
                             prior_mean, batch_posterior_sample_train,
@@ -126,45 +189,67 @@ def optimize_distributed(dist_strategy,
                             1)
 
                 unscaled_replica_batch_loss_train =\
-                        -(-unscaled_replica_batch_loss_train_vae\
-                          -unscaled_replica_batch_loss_train_iaf_posterior\
-                          -unscaled_replica_batch_loss_train_prior\
-                          -unscaled_replica_batch_loss_train_post_draw)
-                scaled_replica_batch_loss_train = tf.reduce_sum(
-                        unscaled_replica_batch_loss_train * (1./hyperp.batch_size))
-
-            gradients = tape.gradient(scaled_replica_batch_loss_train, nn.trainable_variables)
-            optimizer.apply_gradients(zip(gradients, nn.trainable_variables))
+                        tf.add_n([unscaled_replica_batch_loss_train_vae,
+                                  unscaled_replica_batch_loss_train_iaf_posterior,
+                                  unscaled_replica_batch_loss_train_prior,
+                                  unscaled_replica_batch_loss_train_post_draw])
+                scaled_replica_batch_loss_train = tf.nn.compute_average_loss(
+                        unscaled_replica_batch_loss_train,
+                        global_batch_size = global_batch_size)
+
+            if options.mixed_precision == True:
+                gradients = optimizer.get_unscaled_gradients(tape.gradient(
+                        optimizer.get_scaled_loss(scaled_replica_batch_loss_train),
+                        trainable_variables))
+            else:
+                gradients = tape.gradient(scaled_replica_batch_loss_train, trainable_variables)
+
+            return gradients, unscaled_replica_batch_loss_train,\
+                   unscaled_replica_batch_loss_train_vae,\
+                   unscaled_replica_batch_loss_train_iaf_posterior,\
+                   unscaled_replica_batch_loss_train_prior,\
+                   unscaled_replica_batch_loss_train_post_draw
+
+        def train_step(batch_input_train, batch_latent_train):
+            gradients, unscaled_replica_batch_loss_train,\
+            unscaled_replica_batch_loss_train_vae,\
+            unscaled_replica_batch_loss_train_iaf_posterior,\
+            unscaled_replica_batch_loss_train_prior,\
+            unscaled_replica_batch_loss_train_post_draw =\
+                    train_losses_and_gradients(batch_input_train, batch_latent_train)
+            optimizer.apply_gradients(zip(gradients, trainable_variables))
+            metrics.mean_loss_train_epoch(unscaled_replica_batch_loss_train)
             metrics.mean_loss_train_vae(unscaled_replica_batch_loss_train_vae)
             metrics.mean_loss_train_encoder(unscaled_replica_batch_loss_train_iaf_posterior)
             metrics.mean_loss_train_prior(unscaled_replica_batch_loss_train_prior)
-            metrics.mean_loss_train_post_draw(unscaled_replica_batch_loss_train_post_draw)
+            metrics.mean_loss_train_posterior(unscaled_replica_batch_loss_train_post_draw)
 
-            return scaled_replica_batch_loss_train
+        def dist_train_step(batch_input_train, batch_latent_train):
+            dist_strategy.run(train_step, args=(batch_input_train, batch_latent_train))
 
+        # The number of batches is known and so the loop over the training
+        # batches of an epoch is traced into a single graph
         @tf.function
-        def dist_train_step(batch_input_train, batch_latent_train):
-            per_replica_losses = dist_strategy.experimental_run_v2(
-                    train_step, args=(batch_input_train, batch_latent_train))
-            return dist_strategy.reduce(tf.distribute.ReduceOp.SUM, per_replica_losses, axis=None)
+        def train_epoch(iterator, num_steps):
+            for _ in tf.range(num_steps):
+                dist_train_step(*next(iterator))
 
         #=== Validation Step ===#
+        @tf.function(jit_compile=True)
         def val_step(batch_input_val, batch_latent_val):
-            batch_likelihood_val = nn(batch_input_val)
             batch_post_mean_val, batch_log_post_var_val = nn.encoder(batch_input_val)
-            batch_posterior_sample_val = nn.iaf_chain_posterior((batch_post_mean_val,
-                                                                 batch_log_post_var_val),
-                                                                 sample_flag = True,
-                                                                 infer_flag = False)
+            batch_post_mean_val = tf.cast(batch_post_mean_val, tf.float32)
+            batch_log_post_var_val = tf.cast(batch_log_post_var_val, tf.float32)
+            batch_posterior_sample_val, unscaled_replica_batch_loss_val_iaf_posterior =\
+                    nn.iaf_chain_encoder((batch_post_mean_val, batch_log_post_var_val),
+                                         sample_flag = True,
+                                         infer_flag = True)
+            batch_likelihood_val = tf.cast(nn.decoder(
+                    nn.positivity_constraint(batch_posterior_sample_val)), tf.float32)
 
             unscaled_replica_batch_loss_val_vae = loss_diagonal_weighted_penalized_difference(
                     batch_input_val, batch_likelihood_val,
                     noise_regularization_matrix, 1)
-            unscaled_replica_batch_loss_val_iaf_posterior =\
-                    nn.iaf_chain_posterior((batch_post_mean_val,
-                                            batch_log_post_var_val,
-                                            sample_flag = False,
-                                            infer_flag = True)
             unscaled_replica_batch_loss_val_prior = loss_diagonal_weighted_penalized_difference(
                     prior_mean, batch_posterior_sample_val,
                     prior_covariance_cholesky_inverse,
@@ -173,34 +258,40 @@ def optimize_distributed(dist_strategy,
                     batch_latent_val, batch_posterior_sample_val,
                     1)
 
+            unscaled_replica_batch_loss_val =\
+                    tf.add_n([unscaled_replica_batch_loss_val_vae,
+                              unscaled_replica_batch_loss_val_iaf_posterior,
+                              unscaled_replica_batch_loss_val_prior,
+                              unscaled_replica_batch_loss_val_post_draw])
+
             metrics.mean_loss_val(unscaled_replica_batch_loss_val)
             metrics.mean_loss_val_vae(unscaled_replica_batch_loss_val_vae)
             metrics.mean_loss_val_encoder(unscaled_replica_batch_loss_val_iaf_posterior)
             metrics.mean_loss_val_prior(unscaled_replica_batch_loss_val_prior)
-            metrics.mean_loss_val_post_draw(unscaled_replica_batch_loss_val_post_draw)
+            metrics.mean_loss_val_posterior(unscaled_replica_batch_loss_val_post_draw)
 
-        # @tf.function
-        def dist_val_step(batch_input_val, batch_latent_val):
-            return dist_strategy.experimental_run_v2(
-                    val_step, (batch_input_val, batch_latent_val))
+        @tf.function
+        def dist_val_step(dist_input_and_latent_val):
+            for batch_input_val, batch_latent_val in dist_input_and_latent_val:
+                dist_strategy.run(val_step, args=(batch_input_val, batch_latent_val))
 
         #=== Test Step ===#
+        @tf.function(jit_compile=True)
         def test_step(batch_input_test, batch_latent_test):
-            batch_likelihood_test = nn(batch_input_test)
             batch_post_mean_test, batch_log_post_var_test = nn.encoder(batch_input_test)
-            batch_posterior_sample_test = nn.iaf_chain_posterior((batch_post_mean_test,
-                                                                 batch_log_post_var_test),
-                                                                 sample_flag = True,
-                                                                 infer_flag = False)
+            batch_post_mean_test = tf.cast(batch_post_mean_test, tf.float32)
+            batch_log_post_var_test = tf.cast(batch_log_post_var_test, tf.float32)
+            batch_posterior_sample_test, unscaled_replica_batch_loss_test_iaf_posterior =\
+                    nn.iaf_chain_encoder((batch_post_mean_test, batch_log_post_var_test),
+                                         sample_flag = True,
+                                         infer_flag = True)
+            batch_likelihood_test = tf.cast(nn.decoder(
+                    nn.positivity_constraint(batch_posterior_sample_test)), tf.float32)
+            batch_input_pred_test = tf.cast(nn.decoder(batch_latent_test), tf.float32)
 
             unscaled_replica_batch_loss_test_vae = loss_diagonal_weighted_penalized_difference(
                     batch_input_test, batch_likelihood_test,
                     noise_regularization_matrix, 1)
-            unscaled_replica_batch_loss_test_iaf_posterior =\
-                    nn.iaf_chain_posterior((batch_post_mean_test,
-                                            batch_log_post_var_test,
-                                            sample_flag = False,
-                                            infer_flag = True)
             unscaled_replica_batch_loss_test_prior = loss_diagonal_weighted_penalized_difference(
                     prior_mean, batch_posterior_sample_test,
                     prior_covariance_cholesky_inverse,
@@ -209,27 +300,34 @@ def optimize_distributed(dist_strategy,
                     batch_latent_test, batch_posterior_sample_test,
                     1)
 
+            unscaled_replica_batch_loss_test =\
+                    tf.add_n([unscaled_replica_batch_loss_test_vae,
+                              unscaled_replica_batch_loss_test_iaf_posterior,
+                              unscaled_replica_batch_loss_test_prior,
+                              unscaled_replica_batch_loss_test_post_draw])
+
             metrics.mean_loss_test(unscaled_replica_batch_loss_test)
             metrics.mean_loss_test_vae(unscaled_replica_batch_loss_test_vae)
             metrics.mean_loss_test_encoder(unscaled_replica_batch_loss_test_iaf_posterior)
             metrics.mean_loss_test_prior(unscaled_replica_batch_loss_test_prior)
-            metrics.mean_loss_test_post_draw(unscaled_replica_batch_loss_test_post_draw)
+            metrics.mean_loss_test_posterior(unscaled_replica_batch_loss_test_post_draw)
 
             metrics.mean_relative_error_input_vae(relative_error(
                 batch_input_test, batch_likelihood_test))
-            metrics.mean_relative_error_latent_post_draw(relative_error(
-                batch_latent_test, nn.reparameterize(batch_post_mean_test, batch_log_post_var_test)))
+            metrics.mean_relative_error_latent_posterior(relative_error(
+                batch_latent_test, batch_posterior_sample_test))
             metrics.mean_relative_error_input_decoder(relative_error(
                 batch_input_test, batch_input_pred_test))
 
-        # @tf.function
-        def dist_test_step(batch_input_test, batch_latent_test):
-            return dist_strategy.experimental_run_v2(
-                    test_step, (batch_input_test, batch_latent_test))
+        @tf.function
+        def dist_test_step(dist_input_and_latent_test):
+            for batch_input_test, batch_latent_test in dist_input_and_latent_test:
+                dist_strategy.run(test_step, args=(batch_input_test, batch_latent_test))
 
 ###############################################################################
 #                             Train Neural Network                            #
 ###############################################################################
+    num_steps_train = tf.constant(num_batches_train, dtype=tf.int64)
     print('Beginning Training')
     for epoch in range(hyperp.num_epochs):
         print('================================')
@@ -239,27 +337,19 @@ def optimize_distributed(dist_strategy,
         print('GPUs: ' + options.dist_which_gpus + '\n')
         print('Optimizing %d batches of size %d:' %(num_batches_train, hyperp.batch_size))
         start_time_epoch = time.time()
-        batch_counter = 0
-        total_loss_train = 0
-        for batch_input_train, batch_latent_train in dist_input_and_latent_train:
-            start_time_batch = time.time()
-            #=== Compute Train Step ===#
-            batch_loss_train = dist_train_step(
-                    batch_input_train, batch_latent_train)
-            total_loss_train += batch_loss_train
-            elapsed_time_batch = time.time() - start_time_batch
-            if batch_counter  == 0:
-                print('Time per Batch: %.4f' %(elapsed_time_batch))
-            batch_counter += 1
-        metrics.mean_loss_train = total_loss_train/batch_counter
+
+        #=== Compute Train Steps ===#
+        start_time_train = time.time()
+        train_epoch(iter(dist_input_and_latent_train), num_steps_train)
+        elapsed_time_train = time.time() - start_time_train
+        print('Time per Batch: %.4f' %(elapsed_time_train/num_batches_train))
+        metrics.mean_loss_train = metrics.mean_loss_train_epoch.result()
 
         #=== Computing Validation Metrics ===#
-        for batch_input_val, batch_latent_val in dist_input_and_latent_val:
-            dist_val_step(batch_input_val, batch_latent_val)
+        dist_val_step(dist_input_and_latent_val)
 
         #=== Computing Test Metrics ===#
-        for batch_input_test, batch_latent_test in dist_input_and_latent_test:
-            dist_test_step(batch_input_test, batch_latent_test)
+        dist_test_step(dist_input_and_latent_test)
 
         #=== Tensorboard Tracking Training Metrics, Weights and Gradients ===#
         metrics.update_tensorboard(summary_writer, epoch)
@@ -274,20 +364,20 @@ def optimize_distributed(dist_strategy,
                 %(metrics.mean_loss_train,
                   metrics.mean_loss_train_vae.result(),
                   metrics.mean_loss_train_encoder.result(),
-                  metrics.mean_loss_train_post_draw.result()))
+                  metrics.mean_loss_train_posterior.result()))
         print('Val Loss: Full: %.3e, VAE: %.3e, iaf: %.3e, post_draw: %.3e'\
                 %(metrics.mean_loss_val.result(),
                   metrics.mean_loss_val_vae.result(),
                   metrics.mean_loss_val_encoder.result(),
-                  metrics.mean_loss_val_post_draw.result()))
+                  metrics.mean_loss_val_posterior.result()))
         print('Test Loss: Full: %.3e, VAE: %.3e, iaf: %.3e, post_draw: %.3e'\
                 %(metrics.mean_loss_test.result(),
                   metrics.mean_loss_test_vae.result(),
                   metrics.mean_loss_test_encoder.result(),
-                  metrics.mean_loss_val_post_draw.result()))
+                  metrics.mean_loss_val_posterior.result()))
         print('Rel Errors: VAE: %.3e, Post Draw: %.3e, Decoder: %.3e\n'\
                 %(metrics.mean_relative_error_input_vae.result(),
-                  metrics.mean_relative_error_latent_post_draw.result(),
+                  metrics.mean_relative_error_latent_posterior.result(),
                   metrics.mean_relative_error_input_decoder.result()))
         start_time_epoch = time.time()
 
@@ -296,13 +386,16 @@ def optimize_distributed(dist_strategy,
 
         #=== Save Current Model and Metrics ===#
         if epoch % 5 == 0:
-            nn.save_weights(filepaths.trained_nn)
-            metrics.save_metrics(filepaths)
-            dump_attrdict_as_yaml(hyperp, filepaths.directory_trained_nn, 'hyperp')
-            dump_attrdict_as_yaml(options, filepaths.directory_trained_nn, 'options')
-            print('Current Model and Metrics Saved')
+            if save_future is not None:
+                save_future.result()
+            nn.save_weights(filepaths.trained_nn, options = checkpoint_options)
+            save_future = executor.submit(save_metrics_and_dictionaries, copy.copy(metrics))
+            print('Current Model Saved, Metrics Saving in Background')
 
     #=== Save Final Model ===#
+    if save_future is not None:
+        save_future.result()
+    executor.shutdown(wait=True)
     nn.save_weights(filepaths.trained_nn)
     metrics.save_metrics(filepaths)
     dump_attrdict_as_yaml(hyperp, filepaths.directory_trained_nn, 'hyperp')
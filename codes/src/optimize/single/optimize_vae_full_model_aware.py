@@ -67,12 +67,6 @@ def optimize(hyperp, options, filepaths,
              noise_regularization_matrix,
              prior_mean, prior_cov_inv):
 
-    #=== Kronecker Product of Identity and Prior Covariance Inverse ===#
-    identity_otimes_prior_cov_inv =\
-            tf.linalg.LinearOperatorKronecker(
-                    [tf.linalg.LinearOperatorFullMatrix(tf.eye(latent_dimension)),
-                    tf.linalg.LinearOperatorFullMatrix(prior_cov_inv)])
-
     #=== Define Metrics ===#
     metrics = Metrics()
 
@@ -105,15 +99,15 @@ def optimize(hyperp, options, filepaths,
                             batch_input_train, batch_likelihood_train,
                             noise_regularization_matrix,
                             1)
-            batch_loss_train_kld =\
+            batch_loss_train_kld, batch_two_sum_log_post_std_train =\
                     loss_kld_full(
                             batch_post_mean_train, batch_log_post_std_train,
                             batch_post_cov_chol_train,
-                            prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                            prior_mean, prior_cov_inv,
                             1)
             batch_loss_train_posterior =\
                     (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                    2*tf.reduce_sum(batch_log_post_std_train,axis=1) +\
+                    batch_two_sum_log_post_std_train +\
                     loss_weighted_post_cov_full_penalized_difference(
                             batch_latent_train, batch_post_mean_train,
                             batch_post_cov_chol_train,
@@ -145,15 +139,15 @@ def optimize(hyperp, options, filepaths,
                         batch_input_val, batch_likelihood_val,
                         noise_regularization_matrix,
                         1)
-        batch_loss_val_kld =\
+        batch_loss_val_kld, batch_two_sum_log_post_std_val =\
                 loss_kld_full(
                         batch_post_mean_val, batch_log_post_std_val,
                         batch_post_cov_chol_val,
-                        prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                        prior_mean, prior_cov_inv,
                         1)
         batch_loss_val_posterior =\
                 (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                2*tf.reduce_sum(batch_log_post_std_val,axis=1) +\
+                batch_two_sum_log_post_std_val +\
                 loss_weighted_post_cov_full_penalized_difference(
                         batch_latent_val, batch_post_mean_val,
                         batch_post_cov_chol_val,
@@ -181,15 +175,15 @@ def optimize(hyperp, options, filepaths,
                         batch_input_test, batch_likelihood_test,
                         noise_regularization_matrix,
                         1)
-        batch_loss_test_kld =\
+        batch_loss_test_kld, batch_two_sum_log_post_std_test =\
                 loss_kld_full(
                         batch_post_mean_test, batch_log_post_std_test,
                         batch_post_cov_chol_test,
-                        prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                        prior_mean, prior_cov_inv,
                         1)
         batch_loss_test_posterior =\
                 (1-hyperp.penalty_js)/hyperp.penalty_js *\
-                2*tf.reduce_sum(batch_log_post_std_test,axis=1) +\
+                batch_two_sum_log_post_std_test +\
                 loss_weighted_post_cov_full_penalized_difference(
                         batch_latent_test, batch_post_mean_test,
                         batch_post_cov_chol_test,
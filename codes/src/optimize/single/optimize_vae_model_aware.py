@@ -9,9 +9,13 @@ In preparation for optimization, this script will:
     4) Build the neural network and display a summary
 
 Then, per epoch, this script will:
-    1) Using train_step() form the batched gradient using the training set
-    2) Using val_step() evaluate the metrics on the validation set
-    3) Using test_step() evaluate the metrics on the testing set
+    1) Using train_step() form the batched gradient using the training set;
+       the loop over the training batches is traced into the graph of
+       train_epoch()
+    2) Using val_step() evaluate the metrics on the validation set; the loop
+       over the validation batches is traced into the graph of val_epoch()
+    3) Using test_step() evaluate the metrics on the testing set; the loop
+       over the testing batches is traced into the graph of test_epoch()
     4) Update the Tensorboard metrics
     5) Update the storage arrays
     6) Display and reset the current metric values
@@ -23,9 +27,13 @@ Inputs:
     - options: dictionary storing the set options
     - filepaths: instance of the FilePaths class storing the default strings for
                  importing and exporting required objects.
-    - nn: the neural network to be trained
+    - nn: the neural network to be trained. If options.mixed_precision is True,
+          nn is constructed under the mixed_bfloat16 policy; the output layers
+          of its encoder and decoder compute in float32 and so the loss
+          functionals are still evaluated in float32
     - optimizer: Tensorflow optimizer to be used
-    - input_and_latent_: batched train, validation and testing datasets
+    - input_and_latent_: batched and prefetched train, validation and testing
+                         datasets
     - input_dimension: dimension of the input layer of the neural network
     - latent_dimension: dimension of the model posterior mean estimate output by
                         the encoder
@@ -39,23 +47,20 @@ Author: Hwan Goh, Oden Institute, Austin, Texas 2020
 import sys
 sys.path.append('../..')
 
-import shutil # for deleting directories
 import os
 import time
 
 import tensorflow as tf
 import numpy as np
-import pandas as pd
 
 # Import src code
-from utils_training.metrics_vae import Metrics
+from utils_training.metrics_vae import Metrics, StackedMean
 from utils_io.config_io import dump_attrdict_as_yaml
 from utils_training.functionals import\
-        loss_diagonal_weighted_penalized_difference, loss_kld,\
+        loss_diagonal_weighted_penalized_difference,\
+        loss_diagonal_log_var_weighted_penalized_difference, loss_kld,\
         relative_error
 
-import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
-
 ###############################################################################
 #                             Training Properties                             #
 ###############################################################################
@@ -69,28 +74,70 @@ def optimize(hyperp, options, filepaths,
     #=== Define Metrics ===#
     metrics = Metrics()
 
+    #=== Stacked Loss Metrics ===#
+    # The losses of each step are accumulated with a single variable update
+    # and passed to the corresponding metrics once per epoch
+    mean_losses_train = StackedMean(
+            metrics.mean_loss_train,
+            metrics.mean_loss_train_vae,
+            metrics.mean_loss_train_encoder,
+            metrics.mean_loss_train_posterior)
+    mean_losses_val = StackedMean(
+            metrics.mean_loss_val,
+            metrics.mean_loss_val_vae,
+            metrics.mean_loss_val_encoder,
+            metrics.mean_loss_val_posterior)
+    mean_losses_test = StackedMean(
+            metrics.mean_loss_test,
+            metrics.mean_loss_test_vae,
+            metrics.mean_loss_test_encoder,
+            metrics.mean_loss_test_posterior)
+
     #=== Creating Directory for Trained Neural Network ===#
     if not os.path.exists(filepaths.directory_trained_nn):
         os.makedirs(filepaths.directory_trained_nn)
 
     #=== Tensorboard ===# "tensorboard --logdir=tensorboard"
     if os.path.exists(filepaths.directory_tensorboard):
+        import shutil # for deleting directories
         shutil.rmtree(filepaths.directory_tensorboard)
     summary_writer = tf.summary.create_file_writer(filepaths.directory_tensorboard)
 
     #=== Display Neural Network Architecture ===#
-    nn.build((hyperp.batch_size, input_dimensions))
+    nn.build((None, input_dimensions))
     nn.summary()
 
+    #=== Trainable Variables ===#
+    # Fetched once after building rather than traversing the layers every step
+    trainable_variables = nn.trainable_variables
+
 ###############################################################################
 #                   Training, Validation and Testing Step                     #
 ###############################################################################
+    #=== Loss Functional Constants as Single Precision Tensors ===#
+    # Coerced once here so that the steps capture them as constants rather than
+    # converting the numpy arrays on every trace
+    noise_regularization_matrix = tf.cast(noise_regularization_matrix, tf.float32)
+    prior_mean = tf.cast(prior_mean, tf.float32)
+    prior_cov_inv = tf.cast(prior_cov_inv, tf.float32)
+
+    #=== Jensen-Shannon Penalty Coefficient as a Constant Tensor ===#
+    penalty_js_coefficient = tf.constant(
+            (1 - float(hyperp.penalty_js))/float(hyperp.penalty_js), dtype=tf.float32)
+
+    #=== Input Signature of the Steps ===#
+    # The batch dimension is left unspecified so that the final, possibly
+    # smaller, batch does not retrace the steps
+    batch_signature = [tf.TensorSpec([None, input_dimensions], tf.float32),
+                       tf.TensorSpec([None, latent_dimension], tf.float32)]
+
     #=== Train Step ===#
-    @tf.function
+    @tf.function(jit_compile=True, input_signature=batch_signature)
     def train_step(batch_input_train, batch_latent_train):
         with tf.GradientTape() as tape:
-            batch_likelihood_train = nn(batch_input_train)
             batch_post_mean_train, batch_log_post_var_train = nn.encoder(batch_input_train)
+            batch_likelihood_train = nn.decoder(
+                    nn.reparameterize(batch_post_mean_train, batch_log_post_var_train))
 
             batch_loss_train_vae =\
                     loss_diagonal_weighted_penalized_difference(
@@ -103,32 +150,34 @@ def optimize(hyperp, options, filepaths,
                             prior_mean, prior_cov_inv,
                             1)
             batch_loss_train_posterior =\
-                    (1-hyperp.penalty_js)/hyperp.penalty_js *\
+                    penalty_js_coefficient *\
                     tf.reduce_sum(batch_log_post_var_train,axis=1) +\
-                    loss_diagonal_weighted_penalized_difference(
+                    loss_diagonal_log_var_weighted_penalized_difference(
                             batch_latent_train, batch_post_mean_train,
-                            1/tf.math.exp(batch_log_post_var_train/2),
-                            (1-hyperp.penalty_js)/hyperp.penalty_js)
+                            batch_log_post_var_train,
+                            penalty_js_coefficient)
 
-            batch_loss_train = -(-batch_loss_train_vae\
-                                 -batch_loss_train_kld\
-                                 -batch_loss_train_posterior)
+            batch_loss_train = batch_loss_train_vae +\
+                               batch_loss_train_kld +\
+                               batch_loss_train_posterior
             batch_loss_train_mean = tf.reduce_mean(batch_loss_train, axis=0)
 
-        gradients = tape.gradient(batch_loss_train_mean, nn.trainable_variables)
-        optimizer.apply_gradients(zip(gradients, nn.trainable_variables))
-        metrics.mean_loss_train(batch_loss_train)
-        metrics.mean_loss_train_posterior(batch_loss_train_posterior)
-        metrics.mean_loss_train_vae(batch_loss_train_vae)
-        metrics.mean_loss_train_encoder(batch_loss_train_kld)
+        gradients = tape.gradient(batch_loss_train_mean, trainable_variables)
+        optimizer.apply_gradients(list(zip(gradients, trainable_variables)))
+        mean_losses_train(
+                batch_loss_train,
+                batch_loss_train_vae,
+                batch_loss_train_kld,
+                batch_loss_train_posterior)
 
         return gradients
 
     #=== Validation Step ===#
-    @tf.function
+    @tf.function(jit_compile=True, input_signature=batch_signature)
     def val_step(batch_input_val, batch_latent_val):
-        batch_likelihood_val = nn(batch_input_val)
         batch_post_mean_val, batch_log_post_var_val = nn.encoder(batch_input_val)
+        batch_likelihood_val = nn.decoder(
+                nn.reparameterize(batch_post_mean_val, batch_log_post_var_val))
 
         batch_loss_val_vae =\
                 loss_diagonal_weighted_penalized_difference(
@@ -141,27 +190,29 @@ def optimize(hyperp, options, filepaths,
                         prior_mean, prior_cov_inv,
                         1)
         batch_loss_val_posterior =\
-                (1-hyperp.penalty_js)/hyperp.penalty_js *\
+                penalty_js_coefficient *\
                 tf.reduce_sum(batch_log_post_var_val,axis=1) +\
-                loss_diagonal_weighted_penalized_difference(
+                loss_diagonal_log_var_weighted_penalized_difference(
                         batch_latent_val, batch_post_mean_val,
-                        1/tf.math.exp(batch_log_post_var_val/2),
-                        (1-hyperp.penalty_js)/hyperp.penalty_js)
+                        batch_log_post_var_val,
+                        penalty_js_coefficient)
 
-        batch_loss_val = -(-batch_loss_val_vae\
-                           -batch_loss_val_kld\
-                           -batch_loss_val_posterior)
+        batch_loss_val = batch_loss_val_vae +\
+                         batch_loss_val_kld +\
+                         batch_loss_val_posterior
 
-        metrics.mean_loss_val(batch_loss_val)
-        metrics.mean_loss_val_posterior(batch_loss_val_posterior)
-        metrics.mean_loss_val_vae(batch_loss_val_vae)
-        metrics.mean_loss_val_encoder(batch_loss_val_kld)
+        mean_losses_val(
+                batch_loss_val,
+                batch_loss_val_vae,
+                batch_loss_val_kld,
+                batch_loss_val_posterior)
 
     #=== Test Step ===#
-    @tf.function
+    @tf.function(jit_compile=True, input_signature=batch_signature)
     def test_step(batch_input_test, batch_latent_test):
-        batch_likelihood_test = nn(batch_input_test)
         batch_post_mean_test, batch_log_post_var_test = nn.encoder(batch_input_test)
+        batch_likelihood_test = nn.decoder(
+                nn.reparameterize(batch_post_mean_test, batch_log_post_var_test))
         batch_input_pred_test = nn.decoder(batch_latent_test)
 
         batch_loss_test_vae =\
@@ -175,21 +226,22 @@ def optimize(hyperp, options, filepaths,
                         prior_mean, prior_cov_inv,
                         1)
         batch_loss_test_posterior =\
-                (1-hyperp.penalty_js)/hyperp.penalty_js *\
+                penalty_js_coefficient *\
                 tf.reduce_sum(batch_log_post_var_test,axis=1) +\
-                loss_diagonal_weighted_penalized_difference(
+                loss_diagonal_log_var_weighted_penalized_difference(
                         batch_latent_test, batch_post_mean_test,
-                        1/tf.math.exp(batch_log_post_var_test/2),
-                        (1-hyperp.penalty_js)/hyperp.penalty_js)
+                        batch_log_post_var_test,
+                        penalty_js_coefficient)
 
-        batch_loss_test = -(-batch_loss_test_vae\
-                            -batch_loss_test_kld\
-                            -batch_loss_test_posterior)
+        batch_loss_test = batch_loss_test_vae +\
+                          batch_loss_test_kld +\
+                          batch_loss_test_posterior
 
-        metrics.mean_loss_test(batch_loss_test)
-        metrics.mean_loss_test_vae(batch_loss_test_vae)
-        metrics.mean_loss_test_encoder(batch_loss_test_kld)
-        metrics.mean_loss_test_posterior(batch_loss_test_posterior)
+        mean_losses_test(
+                batch_loss_test,
+                batch_loss_test_vae,
+                batch_loss_test_kld,
+                batch_loss_test_posterior)
 
         metrics.mean_relative_error_input_vae(relative_error(
             batch_input_test, batch_likelihood_test))
@@ -198,6 +250,26 @@ def optimize(hyperp, options, filepaths,
         metrics.mean_relative_error_input_decoder(relative_error(
             batch_input_test, batch_input_pred_test))
 
+    #=== Train, Validation and Test Epochs ===#
+    # The loops over the batches are traced into a single graph each. The
+    # gradients of the last training batch are returned for the gradient norms
+    @tf.function
+    def train_epoch(input_and_latent_train):
+        gradients = [tf.zeros_like(variable) for variable in trainable_variables]
+        for batch_input_train, batch_latent_train in input_and_latent_train:
+            gradients = train_step(batch_input_train, batch_latent_train)
+        return gradients
+
+    @tf.function
+    def val_epoch(input_and_latent_val):
+        for batch_input_val, batch_latent_val in input_and_latent_val:
+            val_step(batch_input_val, batch_latent_val)
+
+    @tf.function
+    def test_epoch(input_and_latent_test):
+        for batch_input_test, batch_latent_test in input_and_latent_test:
+            test_step(batch_input_test, batch_latent_test)
+
 ###############################################################################
 #                             Train Neural Network                            #
 ###############################################################################
@@ -210,36 +282,49 @@ def optimize(hyperp, options, filepaths,
         print('GPU: ' + options.which_gpu + '\n')
         print('Optimizing %d batches of size %d:' %(num_batches_train, hyperp.batch_size))
         start_time_epoch = time.time()
-        for batch_num, (batch_input_train, batch_latent_train) in input_and_latent_train.enumerate():
-            start_time_batch = time.time()
-            #=== Computing Train Step ===#
-            gradients = train_step(batch_input_train, batch_latent_train)
-            elapsed_time_batch = time.time() - start_time_batch
-            if batch_num  == 0:
-                print('Time per Batch: %.4f' %(elapsed_time_batch))
+
+        #=== Computing Train Steps ===#
+        gradients = train_epoch(input_and_latent_train)
+        elapsed_time_train = time.time() - start_time_epoch
+        print('Time per Batch: %.4f' %(elapsed_time_train/num_batches_train))
 
         #=== Computing Relative Errors Validation ===#
-        for batch_input_val, batch_latent_val in input_and_latent_val:
-            val_step(batch_input_val, batch_latent_val)
+        val_epoch(input_and_latent_val)
 
         #=== Computing Relative Errors Test ===#
-        for batch_input_test, batch_latent_test in input_and_latent_test:
-            test_step(batch_input_test, batch_latent_test)
+        test_epoch(input_and_latent_test)
 
         #=== Update Current Relative Gradient Norm ===#
-        with summary_writer.as_default():
-            for w in nn.weights:
-                tf.summary.histogram(w.name, w, step=epoch)
-            l2_norm = lambda t: tf.sqrt(tf.reduce_sum(tf.pow(t, 2)))
-            sum_gradient_norms = 0.0
-            for gradient, variable in zip(gradients, nn.trainable_variables):
-                tf.summary.histogram("gradients_norm/" + variable.name, l2_norm(gradient),
-                        step = epoch)
-                sum_gradient_norms += l2_norm(gradient)
-                if epoch == 0:
-                    initial_sum_gradient_norms = sum_gradient_norms
+        l2_norm = lambda t: tf.sqrt(2.0*tf.nn.l2_loss(t))
+        gradient_norms = [l2_norm(gradient) for gradient in gradients]
+        sum_gradient_norms = tf.add_n(gradient_norms)
+        if epoch == 0:
+            initial_sum_gradient_norms = sum_gradient_norms
         metrics.relative_gradient_norm = sum_gradient_norms/initial_sum_gradient_norms
 
+        #=== Weight and Gradient Summaries ===#
+        # Full histograms are only written every 50 epochs; in between the root
+        # mean square of each weight is computed on the device and written as
+        # a scalar
+        with summary_writer.as_default():
+            if epoch % 50 == 0:
+                for w in nn.weights:
+                    tf.summary.histogram(w.name, w, step=epoch)
+                for gradient_norm, variable in zip(gradient_norms, trainable_variables):
+                    tf.summary.histogram("gradients_norm/" + variable.name, gradient_norm,
+                            step = epoch)
+            else:
+                for w in nn.weights:
+                    tf.summary.scalar("w_rms/" + w.name, tf.sqrt(tf.reduce_mean(w*w)),
+                            step = epoch)
+                for gradient_norm, variable in zip(gradient_norms, trainable_variables):
+                    tf.summary.scalar("gradient_norm/" + variable.name, gradient_norm,
+                            step = epoch)
+
+        #=== Pass the Stacked Loss Means to the Metrics ===#
+        for mean_losses in (mean_losses_train, mean_losses_val, mean_losses_test):
+            mean_losses.unstack()
+
         #=== Track Training Metrics, Weights and Gradients ===#
         metrics.update_tensorboard(summary_writer, epoch)
 
@@ -249,30 +334,35 @@ def optimize(hyperp, options, filepaths,
         #=== Display Epoch Iteration Information ===#
         elapsed_time_epoch = time.time() - start_time_epoch
         print('Time per Epoch: %.4f\n' %(elapsed_time_epoch))
+        # All displayed values are stacked on the device and fetched together
+        # so that the host synchronizes once rather than once per value
+        display_values = tf.stack(
+                [metric.result() for metric in (
+                    metrics.mean_loss_train, metrics.mean_loss_train_vae,
+                    metrics.mean_loss_train_encoder, metrics.mean_loss_train_posterior,
+                    metrics.mean_loss_val, metrics.mean_loss_val_vae,
+                    metrics.mean_loss_val_encoder, metrics.mean_loss_val_posterior,
+                    metrics.mean_loss_test, metrics.mean_loss_test_vae,
+                    metrics.mean_loss_test_encoder, metrics.mean_loss_test_posterior,
+                    metrics.mean_relative_error_input_vae,
+                    metrics.mean_relative_error_latent_posterior,
+                    metrics.mean_relative_error_input_decoder)] +
+                [metrics.relative_gradient_norm]).numpy()
         print('Train Loss: Full: %.3e, VAE: %.3e, KLD: %.3e, Posterior: %.3e'\
-                %(metrics.mean_loss_train.result(),
-                  metrics.mean_loss_train_vae.result(),
-                  metrics.mean_loss_train_encoder.result(),
-                  metrics.mean_loss_train_posterior.result()))
+                %tuple(display_values[0:4]))
         print('Val Loss: Full: %.3e, VAE: %.3e, KLD: %.3e, Posterior: %.3e'\
-                %(metrics.mean_loss_val.result(),
-                  metrics.mean_loss_val_vae.result(),
-                  metrics.mean_loss_val_encoder.result(),
-                  metrics.mean_loss_val_posterior.result()))
+                %tuple(display_values[4:8]))
         print('Test Loss: Full: %.3e, VAE: %.3e, KLD: %.3e, Posterior: %.3e'\
-                %(metrics.mean_loss_test.result(),
-                  metrics.mean_loss_test_vae.result(),
-                  metrics.mean_loss_test_encoder.result(),
-                  metrics.mean_loss_test_posterior.result()))
+                %tuple(display_values[8:12]))
         print('Rel Errors: VAE: %.3e, Posterior Mean: %.3e, Decoder: %.3e\n'\
-                %(metrics.mean_relative_error_input_vae.result(),
-                  metrics.mean_relative_error_latent_posterior.result(),
-                  metrics.mean_relative_error_input_decoder.result()))
-        print('Relative Gradient Norm: %.4f\n' %(metrics.relative_gradient_norm))
+                %tuple(display_values[12:15]))
+        print('Relative Gradient Norm: %.4f\n' %(display_values[15]))
         start_time_epoch = time.time()
 
         #=== Resetting Metrics ===#
         metrics.reset_metrics()
+        for mean_losses in (mean_losses_train, mean_losses_val, mean_losses_test):
+            mean_losses.reset_states()
 
         #=== Saving Current Model and Metrics ===#
         if epoch %100 == 0:
@@ -88,23 +88,18 @@ def optimize(hyperp, options, filepaths,
     @tf.function
     def train_step(batch_input_train, batch_latent_train):
         with tf.GradientTape() as tape:
-            batch_likelihood_train = nn(batch_input_train)
             batch_post_mean_train, batch_log_post_var_train = nn.encoder(batch_input_train)
-            batch_posterior_sample_train = nn.iaf_chain_encoder((batch_post_mean_train,
-                                                                 batch_log_post_var_train),
-                                                                 sample_flag = True,
-                                                                 infer_flag = False)
+            batch_posterior_sample_train, batch_loss_train_iaf_encoder =\
+                    nn.iaf_chain_encoder((batch_post_mean_train, batch_log_post_var_train),
+                                         sample_flag = True,
+                                         infer_flag = True)
+            batch_likelihood_train = nn.decoder(nn.positivity_constraint(batch_posterior_sample_train))
 
             batch_loss_train_vae =\
                     loss_diagonal_weighted_penalized_difference(
                             batch_input_train, batch_likelihood_train,
                             noise_regularization_matrix,
                             1)
-            batch_loss_train_iaf_encoder =\
-                    nn.iaf_chain_encoder((batch_post_mean_train,
-                                          batch_log_post_var_train),
-                                          sample_flag = False,
-                                          infer_flag = True)
             batch_loss_train_prior =\
                     loss_diagonal_weighted_penalized_difference(
                             prior_mean, batch_posterior_sample_train,
@@ -134,23 +129,18 @@ def optimize(hyperp, options, filepaths,
     #=== Validation Step ===#
     @tf.function
     def val_step(batch_input_val, batch_latent_val):
-        batch_likelihood_val = nn(batch_input_val)
         batch_post_mean_val, batch_log_post_var_val = nn.encoder(batch_input_val)
-        batch_posterior_sample_val = nn.iaf_chain_encoder((batch_post_mean_val,
-                                                           batch_log_post_var_val),
-                                                           sample_flag = True,
-                                                           infer_flag = False)
+        batch_posterior_sample_val, batch_loss_val_iaf_encoder =\
+                nn.iaf_chain_encoder((batch_post_mean_val, batch_log_post_var_val),
+                                     sample_flag = True,
+                                     infer_flag = True)
+        batch_likelihood_val = nn.decoder(nn.positivity_constraint(batch_posterior_sample_val))
 
         batch_loss_val_vae =\
                 loss_diagonal_weighted_penalized_difference(
                         batch_input_val, batch_likelihood_val,
                         noise_regularization_matrix,
                         1)
-        batch_loss_val_iaf_encoder =\
-                nn.iaf_chain_encoder((batch_post_mean_val,
-                                      batch_log_post_var_val),
-                                      sample_flag = False,
-                                      infer_flag = True)
         batch_loss_val_prior =\
                 loss_diagonal_weighted_penalized_difference(
                         prior_mean, batch_posterior_sample_val,
@@ -175,12 +165,12 @@ def optimize(hyperp, options, filepaths,
     #=== Test Step ===#
     @tf.function
     def test_step(batch_input_test, batch_latent_test):
-        batch_likelihood_test = nn(batch_input_test)
         batch_post_mean_test, batch_log_post_var_test = nn.encoder(batch_input_test)
-        batch_posterior_sample_test = nn.iaf_chain_encoder((batch_post_mean_test,
-                                                            batch_log_post_var_test),
-                                                            sample_flag = True,
-                                                            infer_flag = False)
+        batch_posterior_sample_test, batch_loss_test_iaf_encoder =\
+                nn.iaf_chain_encoder((batch_post_mean_test, batch_log_post_var_test),
+                                     sample_flag = True,
+                                     infer_flag = True)
+        batch_likelihood_test = nn.decoder(nn.positivity_constraint(batch_posterior_sample_test))
         batch_input_pred_test = nn.decoder(batch_latent_test)
 
         batch_loss_test_vae =\
@@ -188,11 +178,6 @@ def optimize(hyperp, options, filepaths,
                         batch_input_test, batch_likelihood_test,
                         noise_regularization_matrix,
                         1)
-        batch_loss_test_iaf_encoder =\
-                nn.iaf_chain_encoder((batch_post_mean_test,
-                                      batch_log_post_var_test),
-                                      sample_flag = False,
-                                      infer_flag = True)
         batch_loss_test_prior =\
                 loss_diagonal_weighted_penalized_difference(
                         prior_mean, batch_posterior_sample_test,
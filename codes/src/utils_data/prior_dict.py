@@ -0,0 +1,73 @@
+'''Dictionary-like container of prior related objects
+
+Each prior object is only loaded from disk the first time it is accessed and is
+then cached. This means that, for example, a training routine that only uses
+the prior mean and the inverse of the prior covariance never loads the
+covariance, its Cholesky factor or the inverse of the Cholesky factor. Objects
+are accessed as with a dictionary, prior_dict["prior_mean"], or as attributes,
+prior_dict.prior_mean.
+
+Inputs:
+    - prior: instance of the PriorHandler class
+    - load_: flag that dictates whether the corresponding object is available
+
+Author: Hwan Goh, Oden Institute, Austin, Texas 2020
+'''
+import functools
+
+import numpy as np
+
+import pdb #Equivalent of keyboard in MATLAB, just add "pdb.set_trace()"
+
+class PriorDict:
+    def __init__(self, prior,
+                 load_mean = True,
+                 load_covariance = True,
+                 load_covariance_inverse = True,
+                 load_covariance_cholesky = True,
+                 load_covariance_cholesky_inverse = True):
+
+        self.prior = prior
+        self.load_flags = {
+                "prior_mean": load_mean,
+                "prior_covariance": load_covariance,
+                "prior_covariance_inverse": load_covariance_inverse,
+                "prior_covariance_cholesky": load_covariance_cholesky,
+                "prior_covariance_cholesky_inverse": load_covariance_cholesky_inverse}
+
+###############################################################################
+#                              Prior Objects                                  #
+###############################################################################
+    @functools.cached_property
+    def prior_mean(self):
+        return np.expand_dims(self.prior.load_prior_mean(), 0)
+
+    @functools.cached_property
+    def prior_covariance(self):
+        return self.prior.load_prior_covariance()
+
+    @functools.cached_property
+    def prior_covariance_inverse(self):
+        return self.prior.load_prior_covariance_inverse()
+
+    @functools.cached_property
+    def prior_covariance_cholesky(self):
+        return self.prior.load_prior_covariance_cholesky()
+
+    @functools.cached_property
+    def prior_covariance_cholesky_inverse(self):
+        return self.prior.load_prior_covariance_cholesky_inverse()
+
+###############################################################################
+#                              Dictionary Access                              #
+###############################################################################
+    def __getitem__(self, key):
+        if not self.load_flags.get(key, False):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return self.load_flags.get(key, False)
+
+    def keys(self):
+        return [key for key, flag in self.load_flags.items() if flag]
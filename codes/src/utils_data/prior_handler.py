@@ -3,7 +3,9 @@
 This class contains methods associated with manipulation of the training and
 testing dataset. Currently, these methods involve loading the prior mean,
 covariance, inverse of the covariance, Cholesky of the covariance and inverse of
-the Cholesky of the covariance.
+the Cholesky of the covariance. Matrices are cached as .npy files next to the
+.csv files on first load and are thereafter memory-mapped read-only so that
+processes sharing a node also share the physical pages.
 
 Inputs:
     - hyperp: dictionary storing set hyperparameter values
@@ -13,6 +15,8 @@ Inputs:
 
 Author: Hwan Goh, Oden Institute, Austin, Texas 2020
 '''
+import os
+
 import numpy as np
 import pandas as pd
 
@@ -50,7 +54,27 @@ class PriorHandler:
         return vector.astype(np.float32).flatten()
 
     def load_matrix(self, filepath):
+        #=== Memory-Mapped Cache ===#
+        # The cache is used when there is no .csv to compare against or when
+        # it is at least as new as the .csv
+        if os.path.exists(filepath + '.npy') and\
+                (not os.path.exists(filepath + '.csv') or
+                 os.path.getmtime(filepath + '.npy') >= os.path.getmtime(filepath + '.csv')):
+            return np.load(filepath + '.npy', mmap_mode='r')
+
+        #=== Parse CSV and Cache ===#
         df_matrix = pd.read_csv(filepath + '.csv')
         matrix = df_matrix.to_numpy()
         matrix = matrix.reshape((self.poi_dimensions, self.poi_dimensions))
-        return matrix.astype(np.float32)
+        matrix = matrix.astype(np.float32)
+        # Written to a file private to this process and then renamed into place
+        # so that concurrent processes never load a partially written cache
+        filepath_tmp = filepath + '.npy.%d.tmp'%(os.getpid())
+        try:
+            with open(filepath_tmp, 'wb') as f:
+                np.save(f, matrix)
+            os.replace(filepath_tmp, filepath + '.npy')
+        except OSError:
+            if os.path.exists(filepath_tmp):
+                os.remove(filepath_tmp)
+        return matrix
@@ -0,0 +1,44 @@
+import numpy as np
+
+def kde_fft(samples, xs):
+    '''Gaussian kernel density estimate of one dimensional samples evaluated on
+    the uniform grid xs. The samples are linearly binned onto a padded copy of
+    the grid and convolved with the kernel using the FFT which costs
+    O(n + m log m) instead of the O(nm) of direct evaluation. The bandwidth
+    follows Scott's rule as in scipy.stats.gaussian_kde.
+
+    Inputs:
+        - samples: one dimensional array of n samples
+        - xs: uniformly spaced grid of m evaluation points
+
+    Outputs:
+        - density: the estimated probability density at each point of xs
+    '''
+    samples = np.asarray(samples, dtype=np.float64).flatten()
+    num_samples = samples.size
+    bandwidth = np.std(samples, ddof=1)*num_samples**(-1/5)
+
+    #=== Padded Grid ===#
+    dx = xs[1] - xs[0]
+    num_pad = int(np.ceil(4*bandwidth/dx))
+    num_grid = len(xs) + 2*num_pad
+    grid_min = xs[0] - num_pad*dx
+
+    #=== Linear Binning ===#
+    positions = (samples - grid_min)/dx
+    left = np.floor(positions).astype(np.int64)
+    weight_right = positions - left
+    inside = (left >= 0) & (left < num_grid - 1)
+    counts = np.bincount(left[inside], weights=1 - weight_right[inside],
+                         minlength=num_grid) +\
+             np.bincount(left[inside] + 1, weights=weight_right[inside],
+                         minlength=num_grid)
+
+    #=== Convolution with Kernel ===#
+    kernel_xs = dx*np.arange(-num_pad, num_pad+1)
+    kernel = np.exp(-0.5*(kernel_xs/bandwidth)**2)/(np.sqrt(2*np.pi)*bandwidth)
+    num_fft = num_grid + len(kernel) - 1
+    density = np.fft.irfft(np.fft.rfft(counts, num_fft)*np.fft.rfft(kernel, num_fft),
+                           num_fft)
+
+    return density[2*num_pad:2*num_pad+len(xs)]/num_samples
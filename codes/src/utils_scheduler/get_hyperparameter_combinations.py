@@ -1,10 +1,21 @@
+import itertools
+import random
+import sys
+import warnings
+
+import numpy as np
+
 ###############################################################################
 #                        Generate List of Scenarios                           #
 ###############################################################################
-def get_hyperparameter_combinations(hyperp):
+def get_hyperparameter_combinations(hyperp, shuffle = False, seed = 0,
+                                    predicate = None):
     '''Converts a dictionary containing lists of possible hyperparameter values
     to a list of dictionaries containing all combinations of these
-    hyperparameter values.
+    hyperparameter values. The Cartesian product is formed by itertools.product
+    and a hyperparameter given as a single value rather than a list is treated
+    as a list with one entry. Values that are themselves lists are kept as
+    single values of their hyperparameter.
 
     Ex. hyperp = {'a': [1, 2],
                     'b': ['c', 'd']}
@@ -15,6 +26,16 @@ def get_hyperparameter_combinations(hyperp):
 
     Inputs:
         - hyperp: either dictionary or class whose attributes are hyperparameters
+        - shuffle: if True, the scenarios are returned in a random order so
+                   that consecutive runs dispatched by the scheduler do not
+                   share all of their leading hyperparameter values
+        - seed: seed of the shuffle so that the order is reproducible
+        - predicate: optional function taking a scenario dictionary and
+                     returning False if the scenario is invalid and should be
+                     discarded. Common examples are
+                        lambda s: s['batch_size'] <= s['num_data_train']
+                        lambda s: s['num_hidden_layers_encoder'] >=
+                                  s['num_hidden_layers_decoder']
 
     Outputs:
         - scenarios: list of hyperparameter dictionaries.
@@ -22,68 +43,120 @@ def get_hyperparameter_combinations(hyperp):
 
     Author: Jonathan Wittmer, Oden Institute, Austin, Texas 2020
     '''
-    hyperp_dict = hyperp.__dict__ if not isinstance(hyperp, dict) else hyperp
-    hyperp_keys = list(hyperp_dict.keys())
-    hyperp_vals = list(hyperp_dict.values())
-    combinations_list = generate_combinations(hyperp_vals[0], hyperp_vals[1:])
-    scenarios = assemble_scenarios_dictionaries(combinations_list, hyperp_keys)
+    scenarios = list(iter_hyperparameter_combinations(hyperp, predicate))
+    if shuffle == True:
+        random.Random(seed).shuffle(scenarios)
 
     return scenarios
 
-def generate_combinations(curr_hyperp, hyperp_vals):
-    '''Recursive algorithm to generate a list of lists
-    containing all the combinations of given set of
-    inputs.
+def iter_hyperparameter_combinations(hyperp, predicate = None):
+    '''Generator version of get_hyperparameter_combinations which yields the
+    scenarios one at a time so that the full list is never held in memory
 
     Inputs:
-        curr_hyperp : loop through the values of this hyperparameter
-                      appending all the combinations of each subsequent
-                      hyperparameter.
-        hyperp_vals : list of the remaining hyperparameters. As the algorithm
-                      runs, this list gets shorter until there is only
-                      a single hyperparameter list
+        - hyperp: either dictionary or class whose attributes are hyperparameters
+        - predicate: optional function taking a scenario dictionary and
+                     returning False if the scenario should be skipped
 
-    Author: Jonathan Wittmer, Oden Institute, Austin, Texas 2020
+    Outputs:
+        - scenario: hyperparameter dictionary of the current scenario
     '''
-    # reassign when it is not the last item - recursive algorithm
-    if len(hyperp_vals) > 1:
-        combos = generate_combinations(hyperp_vals[0], hyperp_vals[1:])
-        is_last_value = False
-    else:
-        combos = hyperp_vals[0]
-        is_last_value = True
-
-    # concatenate the output into a list of lists
-    output = []
-    for i in curr_hyperp:
-        for j in combos:
-            # convert to list if not already for use with extend
-            temp = [i]
-            # if we want to keep the last item a list, use append, not extend
-            if is_last_value and isinstance(j, list):
-                temp.append(j)
-            else:
-                j = j if isinstance(j, list) else [j]
-                temp.extend(j)
-            output.append(temp)
-    return output
-
-def assemble_scenarios_dictionaries(combinations_list, hyperp_keys):
-    '''Converts list of lists to list of dictionaries
+    hyperp_keys, hyperp_vals = hyperparameter_keys_and_values(hyperp)
+
+    # the scenario dictionaries are constructed by chained maps so that no
+    # Python level loop body runs per scenario
+    scenarios = map(dict, map(zip, itertools.repeat(hyperp_keys),
+                              itertools.product(*hyperp_vals)))
+    if predicate is not None:
+        scenarios = filter(predicate, scenarios)
+
+    yield from scenarios
+
+###############################################################################
+#                       Generate Array of Scenarios                           #
+###############################################################################
+def get_hyperparameter_combinations_array(hyperp):
+    '''Forms all combinations of the hyperparameter values as a record array
+    with one named field per hyperparameter so that the scenarios can be
+    filtered and sorted with vectorized numpy operations,
+    e.g. scenarios[scenarios.batch_size <= 100]. Columns of numbers or strings
+    receive the corresponding numpy dtype; any other column, such as one whose
+    values are lists, is stored with the object dtype.
 
     Inputs:
-        - combinations_list: list of lists. the hyperparameter values.
-        - hyperp_key: list of keys. the hyperparameter names
+        - hyperp: either dictionary or class whose attributes are hyperparameters
 
     Outputs:
-        - scenarios: list of dictionaries
+        - scenarios: record array with one row per hyperparameter scenario
+    '''
+    hyperp_keys, hyperp_vals = hyperparameter_keys_and_values(hyperp)
+    columns = zip(*itertools.product(*hyperp_vals))
 
-    Author: Jonathan Wittmer, Oden Institute, Austin, Texas 2020
+    arrays = []
+    for column in columns:
+        if all(isinstance(value, (bool, int, float)) for value in column) or\
+                all(isinstance(value, str) for value in column):
+            array = np.asarray(column)
+        else:
+            array = np.empty(len(column), dtype=object)
+            for row, value in enumerate(column):
+                array[row] = value
+        arrays.append(array)
+
+    return np.rec.fromarrays(arrays, names=list(hyperp_keys))
+
+###############################################################################
+#                      Hyperparameter Keys and Values                         #
+###############################################################################
+def hyperparameter_keys_and_values(hyperp):
+    '''Extracts the hyperparameter names and the lists of their values. A
+    hyperparameter given as a single value rather than a list is treated as a
+    list with one entry. Repeated values of a hyperparameter, that is values
+    of the same type that compare equal, are removed, keeping the first
+    occurrence, so that no scenario is trained twice.
+
+    Inputs:
+        - hyperp: either dictionary or class whose attributes are hyperparameters.
+                  The attributes of a class are read with vars() or, for a
+                  class that defines __slots__, from the assigned slots of it
+                  and its base classes. Attributes whose names begin with an
+                  underscore are ignored
+
+    Outputs:
+        - hyperp_keys: tuple of the hyperparameter names
+        - hyperp_vals: list containing the list of values of each hyperparameter
     '''
-    scenarios = []
-    for scenario_list in combinations_list:
-        curr_scenario = {}
-        for key, value in zip(hyperp_keys, scenario_list):
-            curr_scenario[key] = value
-        scenarios.append(curr_scenario)
-    return scenarios
+    if isinstance(hyperp, dict):
+        hyperp_dict = hyperp
+    elif hasattr(hyperp, '__dict__'):
+        hyperp_dict = vars(hyperp)
+    else:
+        hyperp_dict = {}
+        for cls in reversed(type(hyperp).__mro__):
+            slots = cls.__dict__.get('__slots__', ())
+            slots = (slots,) if isinstance(slots, str) else slots
+            for key in slots:
+                if key not in ('__dict__', '__weakref__') and hasattr(hyperp, key):
+                    hyperp_dict[key] = getattr(hyperp, key)
+    # private attributes of a hyperparameter class are not hyperparameters
+    hyperp_dict = {key: vals for key, vals in hyperp_dict.items()
+                   if not key.startswith('_')}
+    hyperp_keys = tuple(hyperp_dict.keys())
+    hyperp_vals = []
+    for key, vals in hyperp_dict.items():
+        vals = vals if isinstance(vals, (list, tuple)) else [vals]
+        unique_vals = []
+        for value in vals:
+            # values are compared together with their types so that, for
+            # example, 1, 1.0 and True remain different hyperparameter values
+            if not any(type(kept) is type(value) and kept == value
+                       for kept in unique_vals):
+                # string values are shared by many scenarios and are interned so
+                # that comparisons between scenarios reduce to identity checks
+                unique_vals.append(sys.intern(value) if isinstance(value, str) else value)
+        if len(unique_vals) < len(vals):
+            warnings.warn(
+                f'Repeated values of hyperparameter "{key}" have been removed.')
+        hyperp_vals.append(unique_vals)
+
+    return hyperp_keys, hyperp_vals
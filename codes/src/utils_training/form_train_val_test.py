@@ -43,6 +43,13 @@ def form_train_val_test_tf_batches(input_train, output_train,
     num_batches_train = len(list(input_and_output_train))
     num_batches_val = len(list(input_and_output_val))
 
+    #=== Prefetching Batches ===#
+    # The testing set is not shuffled and so its batches are also cached
+    input_and_output_train = input_and_output_train.prefetch(tf.data.experimental.AUTOTUNE)
+    input_and_output_val = input_and_output_val.prefetch(tf.data.experimental.AUTOTUNE)
+    input_and_output_test = input_and_output_test.cache().prefetch(
+            tf.data.experimental.AUTOTUNE)
+
     return input_and_output_train, input_and_output_val, input_and_output_test,\
            num_batches_train, num_batches_val, num_batches_test
 
@@ -25,6 +25,12 @@ def loss_diagonal_weighted_penalized_difference(true, pred, weight_matrix, penal
 ###############################################################################
 #                      Loss Diagonal Posterior Covariance                     #
 ###############################################################################
+def loss_diagonal_log_var_weighted_penalized_difference(true, pred, log_var, penalty):
+    '''penalized squared error of the true and predicted values weighted by
+    the inverse of a diagonal covariance that is stored as the log of its
+    diagonal. The weights exp(-log_var) are formed in a single elementwise pass'''
+    return penalty*tf.reduce_sum(tf.square(true - pred)*tf.math.exp(-log_var), axis=1)
+
 def loss_kld(post_mean, log_post_var,
              prior_mean, prior_cov_inv,
              penalty):
@@ -35,10 +41,11 @@ def loss_kld(post_mean, log_post_var,
     trace_prior_cov_inv_times_cov_post = tf.reduce_sum(
             tf.multiply(tf.linalg.diag_part(prior_cov_inv), tf.math.exp(log_post_var)),
             axis=1)
+    post_mean_minus_prior_mean = post_mean - prior_mean
     prior_weighted_prior_mean_minus_post_mean = tf.reduce_sum(
-            tf.multiply(tf.transpose(prior_mean - post_mean),
-                tf.linalg.matmul(prior_cov_inv, tf.transpose(prior_mean - post_mean))),
-            axis = 0)
+            tf.linalg.matmul(post_mean_minus_prior_mean, prior_cov_inv, transpose_b=True)
+            * post_mean_minus_prior_mean,
+            axis = 1)
     return penalty*(trace_prior_cov_inv_times_cov_post
             + prior_weighted_prior_mean_minus_post_mean
             - tf.math.reduce_sum(log_post_var, axis=1))
@@ -52,59 +59,56 @@ def loss_weighted_post_cov_full_penalized_difference(true, pred,
     '''Monte-Carlo estimate of the Kullback-Leibler divergence
     between the true posterior and the model posterior for the
     case where the model posterior possesses a full covariance
-    matrix
-    '''
-    batched_value = weighted_inner_product_chol_solve(
-                        tf.transpose(tf.reshape(
-                            post_cov_chol[0,:], (true.shape[1], true.shape[1]))),
-                        tf.expand_dims(true[0,:] - pred[0,:], axis=1))
-    for m in range(1, true.shape[0]):
-        batched_value = tf.concat(
-                [batched_value,
-                weighted_inner_product_chol_solve(
-                    tf.transpose(tf.reshape(
-                        post_cov_chol[m,:], (true.shape[1], true.shape[1]))),
-                    tf.expand_dims(true[m,:] - pred[m,:], axis=1))], axis=0)
-    return penalty*tf.squeeze(batched_value)
-
-def weighted_inner_product_chol_solve(weight_matrix, vector):
-    '''Evaluates data-misfit term weighted by the inverse of the full model
-    posterior covariance
+    matrix. The misfit weighted by the inverse of the model posterior
+    covariance is the squared norm of the solution of a triangular system
+    with the Cholesky factor and so the whole batch is weighted with one
+    batched triangular solve
     '''
-    return tf.linalg.matmul(tf.transpose(vector),
-                tf.linalg.solve(tf.transpose(weight_matrix),
-                                tf.linalg.solve(weight_matrix, vector)))
+    dimension = true.shape[1]
+    post_cov_chol = tf.linalg.matrix_transpose(
+            tf.reshape(post_cov_chol, (-1, dimension, dimension)))
+    weighted_difference = tf.linalg.triangular_solve(
+            post_cov_chol, tf.expand_dims(true - pred, axis=2), lower=True)
+    return penalty*tf.reduce_sum(tf.square(weighted_difference), axis=[1,2])
 
 def loss_trace_likelihood(post_cov_chol,
-                          identity_otimes_likelihood_matrix,
+                          likelihood_matrix,
                           penalty):
     '''For the case where the parameter-to-observable map is linear, the
     expectation of the likelihood does not require a Monte-Carlo approximation
-    and so there is an extra trace term which is computed by this function
+    and so there is an extra trace term which is computed by this function.
+
+    Since the Kronecker product of the identity with A maps vec(L) to vec(AL),
+    the Kronecker product is never formed. Each row of post_cov_chol reshaped row-wise is the transpose of the
+    Cholesky factor L and so the trace term tr(L^T A L) is the sum of the
+    entries of L^T*(L^T A^T)
     '''
+    dimension = likelihood_matrix.shape[0]
+    post_cov_chol = tf.reshape(post_cov_chol, (-1, dimension, dimension))
     return penalty*tf.reduce_sum(
-            tf.multiply(tf.transpose(post_cov_chol),
-                identity_otimes_likelihood_matrix.matmul(tf.transpose(post_cov_chol))),
-            axis=0)
+            tf.multiply(post_cov_chol,
+                tf.linalg.matmul(post_cov_chol, likelihood_matrix, transpose_b=True)),
+            axis=[1,2])
 
 def loss_kld_full(post_mean, log_post_std, post_cov_chol,
-                  prior_mean, prior_cov_inv, identity_otimes_prior_cov_inv,
+                  prior_mean, prior_cov_inv,
                   penalty):
     '''Kullback-Leibler divergence between the model posterior and the prior
     model for the case where the model posterior possesses a full covariance
-    matrix
+    matrix. The sum of the log of the posterior variances is also returned so
+    that it can be reused by the posterior penalty term
     '''
-    trace_prior_cov_inv_times_cov_post = tf.reduce_sum(
-            tf.multiply(tf.transpose(post_cov_chol),
-                identity_otimes_prior_cov_inv.matmul(tf.transpose(post_cov_chol))),
-            axis=0)
+    two_sum_log_post_std = 2*tf.math.reduce_sum(log_post_std, axis=1)
+    trace_prior_cov_inv_times_cov_post = loss_trace_likelihood(
+            post_cov_chol, prior_cov_inv, 1)
+    post_mean_minus_prior_mean = post_mean - prior_mean
     prior_weighted_prior_mean_minus_post_mean = tf.reduce_sum(
-            tf.multiply(tf.transpose(prior_mean - post_mean),
-                tf.linalg.matmul(prior_cov_inv, tf.transpose(prior_mean - post_mean))),
-            axis = 0)
+            tf.linalg.matmul(post_mean_minus_prior_mean, prior_cov_inv, transpose_b=True)
+            * post_mean_minus_prior_mean,
+            axis = 1)
     return penalty*(trace_prior_cov_inv_times_cov_post
             + prior_weighted_prior_mean_minus_post_mean
-            - 2*tf.math.reduce_sum(log_post_std, axis=1))
+            - two_sum_log_post_std), two_sum_log_post_std
 
 ###############################################################################
 #                             Loss Forward Model                              #
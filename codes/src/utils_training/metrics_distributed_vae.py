@@ -1,8 +1,10 @@
 '''Class for training, validation and testing metrics
 
 For the distributed strategy, the only difference in terms of metrics is how
-mean_loss_train is computed per batch. In particular, the metrics.Mean() class
-cannot be used.
+mean_loss_train is computed. The training loss of each replica batch is
+accumulated in mean_loss_train_epoch within the training step and
+mean_loss_train stores its result at the end of each epoch. This avoids
+reducing the loss across the replicas and copying it to the host every batch.
 
 The training metrics include:
     - the Tensorflow class metrics.Mean() which computes the mean of the given values
@@ -31,6 +33,7 @@ class Metrics:
         #=== Metrics ===#
         self.mean_loss_train = 0
         with dist_strategy.scope():
+            self.mean_loss_train_epoch = tf.keras.metrics.Mean()
             self.mean_loss_train_vae = tf.keras.metrics.Mean()
             self.mean_loss_train_encoder = tf.keras.metrics.Mean()
             self.mean_loss_train_posterior = tf.keras.metrics.Mean()
@@ -187,6 +190,7 @@ class Metrics:
 #                                 Reset Metrics                               #
 ###############################################################################
     def reset_metrics(self):
+        self.mean_loss_train_epoch.reset_states()
         self.mean_loss_train_vae.reset_states()
         self.mean_loss_train_encoder.reset_states()
         self.mean_loss_train_posterior.reset_states()
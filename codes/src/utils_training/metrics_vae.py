@@ -11,6 +11,10 @@ The methods include:
     - reset_metrics(): resetting the means at each epoch
     - save_metrics(): exporting metrics to uq-vae/trained_nns/
 
+The class StackedMean accumulates several loss metrics that are updated
+together with a single variable update per step and passes their means to the
+corresponding Mean() metrics once per epoch
+
 Author: Hwan Goh, Oden Institute, Austin, Texas 2020
 '''
 import tensorflow as tf
@@ -240,3 +244,36 @@ class Metrics:
 
         df_metrics = pd.DataFrame(metrics_dict)
         df_metrics.to_csv(filepaths.trained_nn + "_metrics" + '.csv', index=False)
+
+###############################################################################
+#                         Stacked Mean of Loss Metrics                        #
+###############################################################################
+class StackedMean:
+    def __init__(self, *target_metrics):
+        '''Sums of several per-sample losses stored in one vector variable.
+
+        Inputs:
+            - target_metrics: the Mean() metrics which, ordered as the values
+                              passed when calling this class, receive the means
+                              in unstack()
+        '''
+        self.target_metrics = target_metrics
+        self.total = tf.Variable(tf.zeros(len(target_metrics)), trainable=False)
+        self.count = tf.Variable(0.0, trainable=False)
+
+    def __call__(self, *values):
+        values = tf.stack(values, axis=-1)
+        self.total.assign_add(tf.reduce_sum(values, axis=0))
+        self.count.assign_add(tf.cast(tf.shape(values)[0], tf.float32))
+
+    def result(self):
+        return tf.math.divide_no_nan(self.total, self.count)
+
+    def unstack(self):
+        if self.count.numpy() > 0:
+            for target_metric, mean in zip(self.target_metrics, self.result().numpy()):
+                target_metric.update_state(mean)
+
+    def reset_states(self):
+        self.total.assign(tf.zeros_like(self.total))
+        self.count.assign(0.0)